@@ -0,0 +1,176 @@
+"""Local stand-in for the Brave Search API, for benchmarks.
+
+Serves ``GET /res/v1/web/search`` (including ``result_filter=locations``)
+and ``GET /res/v1/local/pois`` with Brave-shaped canned results, so the
+search paths can be load-tested without an API key or network. Latency,
+jitter, error rate and a 429 rate limit are configurable, and
+``GET /stats`` counts what the stand-in has served:
+
+    python benchmarks/brave_stub.py --port 8765 --latency 0.2 --error-rate 0.01 --rate-limit 50
+    BRAVE_BASE_URL=http://127.0.0.1:8765/res/v1 BRAVE_API_KEY=stub python server.py
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from typing import Optional
+
+from aiohttp import web
+
+def web_result(query: str, i: int):
+    """One result shaped like Brave's, with the snippets and links agents rarely read."""
+    host = f"site{i}.example.com"
+    url = f"https://{host}/articles/{i}?q={query}"
+    return {
+        "title": f"Result {i} for {query}",
+        "url": url,
+        "is_source_local": False,
+        "is_source_both": False,
+        "description": f"Stand-in result {i} for the query <strong>{query}</strong>. " * 3,
+        "page_age": "2024-05-01T12:00:00",
+        "profile": {"name": host, "url": url, "long_name": host, "img": f"https://imgs.example.com/{i}/favicon.png"},
+        "language": "en",
+        "family_friendly": True,
+        "type": "search_result",
+        "subtype": "generic",
+        "meta_url": {"scheme": "https", "netloc": host, "hostname": host,
+                     "favicon": f"https://imgs.example.com/{i}/favicon.png", "path": f"› articles › {i}"},
+        "thumbnail": {"src": f"https://imgs.example.com/{i}/thumb.jpg", "original": f"https://{host}/img/{i}.jpg",
+                      "logo": False},
+        "age": "May 1, 2024",
+        "extra_snippets": [f"Extra snippet {j} about {query} from result {i}, a sentence or two long."
+                           for j in range(5)],
+        "deep_results": {"buttons": [{"type": "button_result", "title": f"Section {j}", "url": f"{url}#s{j}"}
+                                     for j in range(4)]},
+    }
+
+def web_results(query: str, count: int):
+    return {
+        "type": "search",
+        "query": {"original": query, "show_strict_warning": False, "is_navigational": False,
+                  "country": "us", "bad_results": False, "should_fallback": False, "postal_code": "",
+                  "city": "", "header_country": "", "more_results_available": True, "state": ""},
+        "mixed": {"type": "mixed", "main": [{"type": "web", "index": i, "all": False} for i in range(count)]},
+        "web": {
+            "type": "search",
+            "results": [web_result(query, i) for i in range(count)],
+            "family_friendly": True,
+        },
+    }
+
+def location_ids(query: str, count: int):
+    digest = hashlib.sha1(query.encode()).hexdigest()[:12]
+    return [f"loc-{digest}-{i}" for i in range(count)]
+
+def poi(location_id: str):
+    return {
+        "type": "location_result",
+        "id": location_id,
+        "title": f"Place {location_id}",
+        "url": f"https://places.example.com/{location_id}",
+        "provider_url": f"https://maps.example.com/{location_id}",
+        "coordinates": [37.77, -122.42],
+        "postal_address": {"type": "PostalAddress", "country": "US", "postalCode": "94103",
+                           "streetAddress": "1 Example St", "addressLocality": "San Francisco",
+                           "addressRegion": "CA", "displayAddress": "1 Example St, San Francisco, CA 94103"},
+        "opening_hours": {"current_day": [{"abbr_name": "Mon", "full_name": "Monday",
+                                           "opens": "09:00", "closes": "17:00"}]},
+        "contact": {"telephone": "+1 555 0100"},
+        "rating": {"ratingValue": 4.5, "bestRating": 5, "reviewCount": 120},
+        "categories": ["restaurant"],
+    }
+
+def error_body(status: int, code: str, detail: str):
+    return {"type": "ErrorResponse", "error": {"code": code, "status": status, "detail": detail}}
+
+def make_app(latency: float = 0.2, jitter: float = 0.0, error_rate: float = 0.0, rate_limit: float = 0.0,
+             locations: int = 5, seed: Optional[int] = None) -> web.Application:
+    """The stand-in API.
+
+    Each response waits ``latency`` seconds plus up to ``jitter`` more.
+    ``error_rate`` of the requests fail with a 500. With ``rate_limit`` set,
+    requests beyond that many per second get Brave's 429 response.
+    Location queries return ``locations`` ids.
+    """
+    rng = random.Random(seed)
+    stats = {"requests": 0, "web": 0, "pois": 0, "errors": 0, "rate_limited": 0, "unauthorized": 0}
+    window = {"second": 0, "count": 0}
+
+    @web.middleware
+    async def upstream(request: web.Request, handler) -> web.StreamResponse:
+        if request.path == "/stats":
+            return await handler(request)
+        stats["requests"] += 1
+        delay = latency + (rng.uniform(0, jitter) if jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if not request.headers.get("X-Subscription-Token"):
+            stats["unauthorized"] += 1
+            return web.json_response(error_body(401, "SUBSCRIPTION_TOKEN_INVALID", "Missing token"), status=401)
+        if rate_limit:
+            second = int(time.time())
+            if window["second"] != second:
+                window["second"], window["count"] = second, 0
+            window["count"] += 1
+            if window["count"] > rate_limit:
+                stats["rate_limited"] += 1
+                return web.json_response(
+                    error_body(429, "RATE_LIMITED", "Request rate limit exceeded for plan."), status=429,
+                    headers={"X-RateLimit-Limit": f"{rate_limit:g}, 15000",
+                             "X-RateLimit-Remaining": "0, 15000", "X-RateLimit-Reset": "1, 2592000"}
+                )
+        if error_rate and rng.random() < error_rate:
+            stats["errors"] += 1
+            return web.json_response(error_body(500, "INTERNAL_ERROR", "Stand-in failure"), status=500)
+        return await handler(request)
+
+    async def web_search(request: web.Request) -> web.Response:
+        stats["web"] += 1
+        query = request.query.get("q", "")
+        count = int(request.query.get("count", 10))
+        sections = set(filter(None, request.query.get("result_filter", "web").split(",")))
+        body = web_results(query, count)
+        if "web" not in sections:
+            del body["web"], body["mixed"]
+        if "locations" in sections:
+            body["locations"] = {
+                "type": "locations",
+                "results": [{"type": "location_result", "id": location_id, "title": f"Place {location_id}"}
+                            for location_id in location_ids(query, locations)]
+            }
+        return web.json_response(body)
+
+    async def pois(request: web.Request) -> web.Response:
+        stats["pois"] += 1
+        ids = request.query.getall("ids", [])
+        if not ids or len(ids) > 20:
+            return web.json_response(error_body(422, "VALIDATION", "Between 1 and 20 ids are required"), status=422)
+        return web.json_response({"type": "local_pois", "results": [poi(location_id) for location_id in ids]})
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application(middlewares=[upstream])
+    app.router.add_get("/res/v1/web/search", web_search)
+    app.router.add_get("/res/v1/local/pois", pois)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds, at random")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail with 500")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="requests per second before answering 429, 0 for no limit")
+    parser.add_argument("--locations", type=int, default=5, help="location ids per local query")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    app = make_app(args.latency, args.jitter, args.error_rate, args.rate_limit, args.locations, args.seed)
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Throughput and size reduction of HTML-to-text extraction for fetched pages.
+
+Generates pages shaped like typical articles (head with inline scripts and
+styles, navigation, an article body, sidebar and footer full of links; every
+other one minified without the optional ``</head>``), or reads the HTML files
+given with ``--html``, then:
+
+- extracts them on the event loop, one page per iteration, and then
+  concurrently through ``FetchServer``'s process pool; for both, a ticker
+  measures how late the loop runs, which is what other requests would see,
+- compares the bytes of the raw markup with the JSON of the extracted page.
+
+    python benchmarks/html_extract.py --pages 200 --paragraphs 80
+    python benchmarks/html_extract.py --html saved/*.html --workers 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tools.fetch import FetchServer
+from tools.html_extract import extract
+
+WORDS = ("copilot memory agent search fetch context window token stream cache index vector store latency "
+         "throughput request response server client tool action state render").split()
+
+def sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+def page(rng: random.Random, paragraphs: int, close_head: bool = True) -> str:
+    nav = "".join(f'<li class="nav-item"><a class="nav-link" href="/section/{i}">Section {i}</a></li>'
+                  for i in range(30))
+    body = "".join(
+        f'<h2 id="h{i}" class="heading heading--section">{sentence(rng)}</h2>' if i % 10 == 0 else
+        f'<div class="block block--text" data-index="{i}"><div class="block__inner"><p class="para">'
+        f'{" ".join(sentence(rng) for _ in range(3))} <a class="inline-link" href="https://example.com/ref/{i}" '
+        f'rel="noopener" data-track="ref-{i}">reference {i}</a></p></div></div>'
+        for i in range(paragraphs)
+    )
+    # Frameworks ship the page's data again as JSON for hydration.
+    state = json.dumps({"props": {"paragraphs": [sentence(rng) for _ in range(paragraphs)]}})
+    sidebar = "".join(f'<div class="card"><a href="/related/{i}"><img src="/img/{i}.jpg" alt="">'
+                      f'<span>{sentence(rng)}</span></a></div>' for i in range(15))
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>'
+        f'{sentence(rng)}</title><style>{"body{margin:0;padding:0}" * 200}</style>'
+        f'<script>{"window.dataLayer=window.dataLayer||[];" * 300}</script>'
+        f'<link rel="stylesheet" href="/site.css">{"</head>" if close_head else ""}<body>'
+        f'<header class="site-header"><nav><ul>{nav}</ul></nav></header>'
+        f'<main><article><h1>{sentence(rng)}</h1>{body}</article></main>'
+        f'<aside>{sidebar}</aside>'
+        f'<footer><ul>{nav}</ul><p>Copyright, terms and privacy.</p></footer>'
+        f'<script id="__STATE__" type="application/json">{state}</script>'
+        f'<script src="/app.js"></script><script>{"track();" * 200}</script>'
+        '</body></html>'
+    )
+
+async def with_lag(work):
+    """Run ``work()`` while measuring the worst delay of a 5 ms ticker on the same loop."""
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        loop = asyncio.get_running_loop()
+        while not done:
+            expected = loop.time() + 0.005
+            await asyncio.sleep(0.005)
+            lag = max(lag, loop.time() - expected)
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await work()
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return results, elapsed, lag
+
+async def inline(pages, chunk_size):
+    async def work():
+        results = []
+        for html in pages:
+            results.append(extract(html, "https://example.com/", chunk_size))
+            await asyncio.sleep(0)
+        return results
+    return await with_lag(work)
+
+async def pooled(pages, workers: int, chunk_size):
+    server = FetchServer()
+    server.extract_workers = workers
+    # Start the workers before timing, as a running server would have.
+    await asyncio.gather(*(server._extract("<p>warm</p>", "", None) for _ in range(workers)))
+    try:
+        return await with_lag(lambda: asyncio.gather(
+            *(server._extract(html, "https://example.com/", chunk_size) for html in pages)
+        ))
+    finally:
+        await server.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200, help="synthetic pages to extract")
+    parser.add_argument("--paragraphs", type=int, default=80, help="paragraphs per synthetic page")
+    parser.add_argument("--html", nargs="*", help="extract these HTML files instead of synthetic pages")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="extraction processes")
+    parser.add_argument("--chunk-size", type=int, default=None, help="return the text as chunks of this many characters")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.html:
+        pages = []
+        for path in args.html:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+    else:
+        rng = random.Random(args.seed)
+        pages = [page(rng, args.paragraphs, close_head=i % 2 == 0) for i in range(args.pages)]
+    raw = sum(len(html.encode()) for html in pages)
+    print(f"{len(pages)} pages, {raw / len(pages) / 1024:.1f} KiB of HTML each on average, "
+          f"{os.cpu_count()} CPUs")
+
+    _, elapsed, lag = asyncio.run(inline(pages, args.chunk_size))
+    print(f"  on the loop:   {len(pages) / elapsed:8.1f} pages/s  {elapsed / len(pages) * 1000:6.2f} ms/page  "
+          f"max event loop lag {lag * 1000:6.1f} ms")
+    results, elapsed, lag = asyncio.run(pooled(pages, args.workers, args.chunk_size))
+    print(f"  {args.workers} worker(s):   {len(pages) / elapsed:8.1f} pages/s  {'':15}"
+          f"max event loop lag {lag * 1000:6.1f} ms")
+
+    text = sum(len((result["text"] or "\n".join(result["chunks"])).encode()) for result in results)
+    extracted = sum(len(json.dumps(result).encode()) for result in results)
+    print(f"  returned: raw HTML {raw:,} bytes, extracted JSON {extracted:,} bytes ({extracted / raw:.1%}), "
+          f"text alone {text:,} bytes ({text / raw:.1%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Stress test: concurrent add, delete and search against one MemoryStore.
+
+Writer threads each own a range of keys and repeatedly replace or delete
+them, recording what they expect to be stored. Reader threads keep taking
+snapshots (``get_all``), searching and paging, and check that every
+snapshot is consistent: no key appears twice, every row is one a writer
+actually wrote, and a key's version never goes backwards between two
+snapshots taken by the same reader. At the end the store must hold exactly
+what the writers expect, before and after reopening it.
+
+    python benchmarks/memory_concurrency.py --writers 4 --readers 8 --seconds 10
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.memory import MemoryStore
+
+WORDS = ["copilot", "memory", "search", "langchain", "action", "state", "render", "agent"]
+
+def content_for(key: str, version: int) -> str:
+    return f"{key} v{version} {WORDS[version % len(WORDS)]} {WORDS[hash(key) % len(WORDS)]}"
+
+def parse(content: str):
+    key, version = content.split()[:2]
+    return key, int(version[1:])
+
+def writer(store, ids, keys_per_writer, deadline, expected, counts):
+    rng = random.Random(ids)
+    versions = {}
+    keys = [f"w{ids}-{i}" for i in range(keys_per_writer)]
+    ops = 0
+    while time.monotonic() < deadline:
+        key = rng.choice(keys)
+        if key in versions and rng.random() < 0.3:
+            store.delete(key)
+            del versions[key]
+        else:
+            version = ops
+            store.add(key, content_for(key, version), {"writer": ids})
+            versions[key] = version
+        ops += 1
+    expected.update(versions)
+    counts.append(ops)
+
+def reader(store, deadline, errors, counts):
+    rng = random.Random()
+    last_seen = {}
+    ops = 0
+    try:
+        while time.monotonic() < deadline:
+            choice = rng.random()
+            if choice < 0.2:
+                snapshot = store.get_all()
+                keys = [memory.key for memory in snapshot]
+                if len(keys) != len(set(keys)):
+                    raise AssertionError("duplicate key in snapshot")
+                for memory in snapshot:
+                    key, version = parse(memory.content)
+                    if key != memory.key or memory.content != content_for(key, version):
+                        raise AssertionError(f"torn row {memory}")
+                    if version < last_seen.get(key, -1):
+                        raise AssertionError(f"{key} went back from v{last_seen[key]} to v{version}")
+                    last_seen[key] = version
+            elif choice < 0.9:
+                for memory in store.search(rng.choice(WORDS), limit=20):
+                    key, version = parse(memory.content)
+                    if key != memory.key:
+                        raise AssertionError(f"torn search result {memory}")
+            else:
+                page, _ = store.list_page(50)
+                if len({memory.key for memory in page}) != len(page):
+                    raise AssertionError("duplicate key in page")
+            ops += 1
+    except Exception as e:
+        errors.append(e)
+    counts.append(ops)
+
+def run(backend, args, directory):
+    path = os.path.join(directory, f"stress-{backend}.json")
+    store = MemoryStore(path, backend=backend, write_behind=args.write_behind)
+    deadline = time.monotonic() + args.seconds
+    expected, errors, writes, reads = {}, [], [], []
+    threads = [
+        threading.Thread(target=writer, args=(store, i, args.keys, deadline, expected, writes))
+        for i in range(args.writers)
+    ] + [
+        threading.Thread(target=reader, args=(store, deadline, errors, reads))
+        for _ in range(args.readers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    def check(current):
+        stored = {memory.key: parse(memory.content)[1] for memory in current.get_all()}
+        if stored != expected:
+            lost = {key for key in expected if stored.get(key) != expected[key]}
+            extra = set(stored) - set(expected)
+            raise AssertionError(f"{len(lost)} lost and {len(extra)} unexpected memories")
+
+    check(store)
+    store.close()
+    reopened = MemoryStore(path, backend=backend)
+    check(reopened)
+    reopened.close()
+    if errors:
+        raise errors[0]
+    print(f"{backend:<7} writes {sum(writes) / args.seconds:9,.0f}/s  reads {sum(reads) / args.seconds:9,.0f}/s  "
+          f"final {len(expected):,} memories  ok")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--keys", type=int, default=500, help="keys owned by each writer")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-behind", action="store_true")
+    parser.add_argument("--backend", choices=["json", "sqlite", "both"], default="both")
+    args = parser.parse_args()
+
+    backends = ["json", "sqlite"] if args.backend == "both" else [args.backend]
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in backends:
+            run(backend, args, directory)
+
+if __name__ == "__main__":
+    main()
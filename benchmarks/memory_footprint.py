@@ -0,0 +1,68 @@
+"""Bytes per stored memory: pydantic objects vs. the columnar layout.
+
+Builds the same synthetic store twice, once as a list of ``Memory`` objects
+(how memories used to be held) and once as ``MemoryColumns``, and reports
+the Python heap each one retains, as measured by tracemalloc.
+
+    python benchmarks/memory_footprint.py --count 1000000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.memory import Memory, MemoryColumns, to_epoch
+
+SOURCES = ["docs", "chat", "search", "code"]
+START = datetime(2024, 1, 1)
+
+def synthetic_records(count: int):
+    """Yield fresh records shaped like entries parsed from memory.json."""
+    for i in range(count):
+        yield {
+            "key": f"memory-{i}",
+            "content": f"Synthetic memory {i} about CopilotKit actions, readable state and generative UI.",
+            "metadata": {"source": SOURCES[i % len(SOURCES)], "project": f"project-{i % 50}"} if i % 3 else {},
+            "timestamp": (START + timedelta(seconds=i)).isoformat(),
+        }
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = build()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del store
+    return retained
+
+def build_models(count: int):
+    return [Memory(**record) for record in synthetic_records(count)]
+
+def build_columns(count: int):
+    columns = MemoryColumns()
+    for record in synthetic_records(count):
+        columns.append(record["key"], record["content"], record["metadata"], to_epoch(record["timestamp"]))
+    return columns
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    results = {
+        "pydantic Memory list": measure(lambda: build_models(args.count)),
+        "MemoryColumns": measure(lambda: build_columns(args.count)),
+    }
+    baseline = results["pydantic Memory list"]
+    print(f"{args.count:,} memories")
+    for name, retained in results.items():
+        print(f"  {name:<22} {retained / args.count:8.1f} bytes/memory  ({retained / baseline:.0%})")
+
+if __name__ == "__main__":
+    main()
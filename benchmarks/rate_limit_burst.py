@@ -0,0 +1,103 @@
+"""Upstream request rate while a burst of Brave searches queues on the limiter.
+
+Each of ``--processes`` worker processes serves the stand-in Brave API
+(``brave_stub.py``) in-process, fires its share of ``--burst`` distinct
+searches at once through ``BraveSearchClient`` and records when each one
+reaches the stand-in. All workers share one quota file, as uvicorn workers
+do, so the combined arrivals should be spaced at exactly ``--rate`` per
+second, each worker's searches should be served in the order they were made,
+and only searches whose turn is more than ``--max-wait`` seconds away should
+fail.
+
+    python benchmarks/rate_limit_burst.py --rate 5 --burst 40 --processes 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.brave_stub import make_app
+from tools.brave_client import BraveSearchClient
+from tools.rate_limiter import RateLimiter, RateLimitExceeded
+
+async def burst(args, path, searches):
+    arrivals = []
+
+    @web.middleware
+    async def record(request, handler):
+        arrivals.append(time.time())
+        return await handler(request)
+
+    app = make_app(args.latency)
+    app.middlewares.append(record)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    limiter = RateLimiter(per_second=args.rate, burst=args.bucket, max_wait=args.max_wait, path=path)
+    client = BraveSearchClient("stub", f"http://127.0.0.1:{port}/res/v1", rate_limiter=limiter)
+    served, failed = [], []
+
+    async def search(i):
+        try:
+            await client.web_search(f"burst query {os.getpid()} {i}")
+            served.append(i)
+        except RateLimitExceeded:
+            failed.append(i)
+
+    try:
+        await asyncio.gather(*(search(i) for i in range(searches)))
+    finally:
+        await client.close()
+        await runner.cleanup()
+        limiter.close()
+    return arrivals, served, failed
+
+def worker(args, path, searches, start_at):
+    time.sleep(max(0.0, start_at - time.time()))
+    return asyncio.run(burst(args, path, searches))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=5.0, help="requests per second")
+    parser.add_argument("--bucket", type=int, default=1, help="requests allowed back to back")
+    parser.add_argument("--burst", type=int, default=40, help="searches fired at once, in total")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes sharing the quota")
+    parser.add_argument("--max-wait", type=float, default=10.0, help="seconds a search may queue")
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in upstream delay in seconds")
+    args = parser.parse_args()
+
+    shares = [args.burst // args.processes + (i < args.burst % args.processes) for i in range(args.processes)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quota.db")
+        RateLimiter(per_second=args.rate, path=path).close()  # create the schema up front
+        start_at = time.time() + 1.0
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.starmap(worker, [(args, path, share, start_at) for share in shares])
+
+    arrivals = sorted(t for result in results for t in result[0])
+    served = sum(len(result[1]) for result in results)
+    failed = sum(len(result[2]) for result in results)
+    print(f"{args.burst} searches from {args.processes} process(es) at {args.rate:g}/s "
+          f"(bucket {args.bucket}, max wait {args.max_wait:g}s)")
+    print(f"  served {served}, failed fast {failed}, elapsed {arrivals[-1] - start_at:.2f}s")
+    if len(arrivals) > args.bucket:
+        # Past the initial bucket, arrivals should be paced at the rate.
+        paced = arrivals[args.bucket - 1:]
+        gaps = [b - a for a, b in zip(paced, paced[1:])]
+        print(f"  upstream rate {len(gaps) / (paced[-1] - paced[0]):.3f}/s, "
+              f"gap min {min(gaps) * 1000:.1f} ms max {max(gaps) * 1000:.1f} ms")
+    print(f"  each process served in arrival order: {all(r[1] == sorted(r[1]) for r in results)}")
+
+if __name__ == "__main__":
+    main()
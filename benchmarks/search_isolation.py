@@ -0,0 +1,121 @@
+"""Latency of unrelated endpoints while Brave searches are in flight.
+
+Starts the stand-in Brave API (``brave_stub.py``) and ``server.py`` as
+subprocesses, then measures ``GET /memory/list`` latency twice: on an idle
+server, and while ``--concurrency`` clients keep ``POST /search`` busy
+against an upstream that takes ``--latency`` seconds to answer. With a
+non-blocking Brave client the two sets of percentiles should be close.
+
+    python benchmarks/search_isolation.py --latency 0.3 --concurrency 16 --seconds 5
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def percentile(samples, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else float("nan")
+
+async def wait_ready(session: aiohttp.ClientSession, url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url) as response:
+                if response.status < 500:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+async def probe(session, url, deadline, samples):
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        async with session.get(url) as response:
+            await response.read()
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+
+async def searcher(session, url, deadline, samples, errors):
+    i = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        async with session.post(url, json={"query": f"copilotkit {i}", "count": 10}) as response:
+            await response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        samples.append(time.perf_counter() - start)
+        i += 1
+
+def report(name, samples):
+    print(f"  {name:<28} n={len(samples):>6}  p50 {percentile(samples, 0.5) * 1000:8.1f} ms  "
+          f"p95 {percentile(samples, 0.95) * 1000:8.1f} ms  p99 {percentile(samples, 0.99) * 1000:8.1f} ms")
+
+async def run(args, base):
+    connector = aiohttp.TCPConnector(limit=args.concurrency + 8)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await wait_ready(session, f"{base}/mcp/tools")
+
+        idle = []
+        await probe(session, f"{base}/memory/list?limit=10", time.monotonic() + args.seconds, idle)
+
+        loaded, searches, errors = [], [], []
+        deadline = time.monotonic() + args.seconds
+        await asyncio.gather(
+            probe(session, f"{base}/memory/list?limit=10", deadline, loaded),
+            *(searcher(session, f"{base}/search", deadline, searches, errors) for _ in range(args.concurrency))
+        )
+
+    print(f"upstream latency {args.latency * 1000:.0f} ms, {args.concurrency} concurrent searches")
+    report("/memory/list, idle", idle)
+    report("/memory/list, under search", loaded)
+    report("/search", searches)
+    if errors:
+        print(f"  {len(errors)} searches failed, statuses {sorted(set(errors))}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="stand-in upstream delay in seconds")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    stub_port, server_port = free_port(), free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(
+            os.environ,
+            BRAVE_API_KEY="stub",
+            BRAVE_BASE_URL=f"http://127.0.0.1:{stub_port}/res/v1",
+            BRAVE_RATE_PER_SECOND="1000000",
+            MEMORY_PATH=os.path.join(directory, "memory.json"),
+        )
+        stub = subprocess.Popen([sys.executable, os.path.join(ROOT, "benchmarks", "brave_stub.py"),
+                                 "--port", str(stub_port), "--latency", str(args.latency)])
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--port", str(server_port), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL
+        )
+        try:
+            asyncio.run(run(args, f"http://127.0.0.1:{server_port}"))
+        finally:
+            server.terminate()
+            stub.terminate()
+            server.wait()
+            stub.wait()
+
+if __name__ == "__main__":
+    main()
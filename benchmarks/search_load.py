@@ -0,0 +1,149 @@
+"""Drive the search endpoints at a target request rate and report latency.
+
+Starts the stand-in Brave API (``brave_stub.py``) and ``server.py`` as
+subprocesses, or uses a running server with ``--url``, then sends
+``POST /search`` and ``POST /mcp/execute`` (``brave_web_search``) requests on
+an open-loop schedule at ``--rps``. Latency is measured from each request's
+scheduled start, so a server that falls behind shows up in the percentiles
+instead of lowering the offered load. ``--queries`` sets how many distinct
+queries are cycled through, which controls the cache hit rate.
+
+    python benchmarks/search_load.py --rps 200 --seconds 10 --queries 50
+    python benchmarks/search_load.py --rps 20 --latency 0.3 --error-rate 0.05 --brave-rate 10
+"""
+import argparse
+import asyncio
+import collections
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.search_isolation import free_port, percentile, wait_ready
+
+def request_for(endpoint: str, query: str, args):
+    if endpoint == "search":
+        return "/search", {"query": query, "count": args.count}
+    return "/mcp/execute", {"tool_name": "brave_web_search", "parameters": {"query": query, "count": args.count}}
+
+async def send(session, base, endpoint, query, args, scheduled, results):
+    path, body = request_for(endpoint, query, args)
+    try:
+        async with session.post(f"{base}{path}", json=body) as response:
+            await response.read()
+            status = response.status
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        status = type(e).__name__
+    results[endpoint].append((time.perf_counter() - scheduled, status))
+
+async def drive(args, base):
+    endpoints = ["search", "mcp"] if args.endpoint == "both" else [args.endpoint]
+    results = {endpoint: [] for endpoint in endpoints}
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.max_in_flight)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await wait_ready(session, f"{base}/mcp/tools")
+        tasks = []
+        start = time.perf_counter()
+        total = int(args.rps * args.seconds)
+        for i in range(total):
+            scheduled = start + i / args.rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            query = f"load test query {i % args.queries}"
+            endpoint = endpoints[i % len(endpoints)]
+            tasks.append(asyncio.ensure_future(send(session, base, endpoint, query, args, scheduled, results)))
+        sent_for = time.perf_counter() - start
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+        extra = {}
+        for name in ("search/cache/stats", "search/quota"):
+            async with session.get(f"{base}/{name}") as response:
+                extra[name] = await response.json() if response.status == 200 else None
+    return results, total, sent_for, elapsed, extra
+
+def report(args, results, total, sent_for, elapsed, extra, upstream=None):
+    print(f"offered {args.rps:g} rps for {args.seconds:g}s: {total} requests sent in {sent_for:.2f}s, "
+          f"all answered after {elapsed:.2f}s")
+    for endpoint, samples in results.items():
+        ok = [latency for latency, status in samples if status == 200]
+        statuses = collections.Counter(status for _, status in samples)
+        latencies = [latency for latency, _ in samples]
+        print(f"  {endpoint:<7} {len(samples) / elapsed:8.1f} rps answered, {len(ok) / elapsed:8.1f} rps ok  "
+              f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  p90 {percentile(latencies, 0.9) * 1000:7.1f} ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms  max {max(latencies) * 1000:7.1f} ms")
+        print(f"          statuses {dict(sorted(statuses.items(), key=str))}")
+    cache = extra.get("search/cache/stats")
+    if cache:
+        print(f"  cache: hit ratio {cache['hit_ratio']:.1%}, {cache['misses']} misses, {cache['coalesced']} coalesced")
+    if upstream:
+        print(f"  stand-in: {upstream['requests']} upstream requests, {upstream['errors']} errors, "
+              f"{upstream['rate_limited']} answered 429")
+
+async def stub_stats(port: int):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"http://127.0.0.1:{port}/stats") as response:
+            return await response.json()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running server; otherwise one is started against the stand-in")
+    parser.add_argument("--rps", type=float, default=100.0, help="requests per second to offer")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--endpoint", choices=("search", "mcp", "both"), default="both")
+    parser.add_argument("--queries", type=int, default=100, help="distinct queries to cycle through")
+    parser.add_argument("--count", type=int, default=10, help="results per search")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="open connections to the server")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a request counts as failed")
+    stub = parser.add_argument_group("stand-in API and server (ignored with --url)")
+    stub.add_argument("--latency", type=float, default=0.1, help="stand-in upstream delay in seconds")
+    stub.add_argument("--jitter", type=float, default=0.05, help="up to this many extra seconds per response")
+    stub.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream requests that fail")
+    stub.add_argument("--upstream-rate-limit", type=float, default=0.0,
+                      help="stand-in answers 429 above this many requests per second")
+    stub.add_argument("--brave-rate", type=float, default=1000.0, help="BRAVE_RATE_PER_SECOND for the server")
+    args = parser.parse_args()
+
+    if args.url:
+        results = asyncio.run(drive(args, args.url.rstrip("/")))
+        report(args, *results)
+        return
+
+    stub_port, server_port = free_port(), free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(
+            os.environ,
+            BRAVE_API_KEY="stub",
+            BRAVE_BASE_URL=f"http://127.0.0.1:{stub_port}/res/v1",
+            BRAVE_RATE_PER_SECOND=str(args.brave_rate),
+            BRAVE_QUOTA_PATH=os.path.join(directory, "quota.db"),
+            MEMORY_PATH=os.path.join(directory, "memory.json"),
+        )
+        stub_process = subprocess.Popen([
+            sys.executable, os.path.join(ROOT, "benchmarks", "brave_stub.py"), "--port", str(stub_port),
+            "--latency", str(args.latency), "--jitter", str(args.jitter), "--error-rate", str(args.error_rate),
+            "--rate-limit", str(args.upstream_rate_limit)
+        ])
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--port", str(server_port), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL
+        )
+        try:
+            results = asyncio.run(drive(args, f"http://127.0.0.1:{server_port}"))
+            report(args, *results, upstream=asyncio.run(stub_stats(stub_port)))
+        finally:
+            server.terminate()
+            stub_process.terminate()
+            server.wait()
+            stub_process.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Response size and serialization time of search results per field profile.
+
+Builds a Brave-shaped response with the stand-in's result generator
+(``brave_stub.py``) and, for each ``fields`` profile, runs the work the
+server does per response: project the results, build the response model,
+re-validate it against the route's response model and encode it to JSON, as
+FastAPI does. Reports bytes and microseconds per response for the MCP
+``brave_web_search`` result and for ``POST /search``.
+
+    python benchmarks/search_payload.py --count 20 --repeat 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, TypeAdapter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.brave_stub import web_results
+from tools.search_fields import parse_fields, project_response, project_results
+
+PROFILES = {
+    "full (*)": "*",
+    "compact (default)": None,
+    "title,url": "title,url",
+    "+hostname,snippets": "title,url,description,meta_url.hostname,extra_snippets",
+}
+
+# Same shapes as the models in server.py.
+class MCPResponse(BaseModel):
+    result: Any
+    context: Optional[Dict[str, Any]] = None
+    metadata: Dict[str, Any] = {}
+
+class SearchResponse(BaseModel):
+    results: List[dict]
+    total_count: int
+
+ADAPTERS = {MCPResponse: TypeAdapter(MCPResponse), SearchResponse: TypeAdapter(SearchResponse)}
+
+def respond(model_type, model: BaseModel) -> bytes:
+    # FastAPI validates the returned model against the response model, then encodes it.
+    adapter = ADAPTERS[model_type]
+    value = adapter.validate_python(model.model_dump())
+    return json.dumps(adapter.dump_python(value, mode="json"), ensure_ascii=False, separators=(",", ":")).encode()
+
+def mcp_response(data, fields) -> bytes:
+    return respond(MCPResponse, MCPResponse(result=project_response(data, fields)))
+
+def search_response(data, fields) -> bytes:
+    web = data.get("web", {})
+    return respond(SearchResponse, SearchResponse(results=project_results(web.get("results", []), fields),
+                                                  total_count=web.get("totalCount", 0)))
+
+def measure(build, data, fields, repeat: int):
+    body = build(data, fields)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        build(data, fields)
+    return len(body), (time.perf_counter() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20, help="results per response")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    data = web_results("copilotkit memory", args.count)
+    print(f"{args.count} results per response, upstream body {len(json.dumps(data)):,} bytes")
+    for name, build in (("brave_web_search (MCP)", mcp_response), ("POST /search", search_response)):
+        print(name)
+        baseline = None
+        for profile, value in PROFILES.items():
+            size, seconds = measure(build, data, parse_fields(value), args.repeat)
+            baseline = baseline or (size, seconds)
+            print(f"  {profile:<20} {size:>9,} bytes ({size / baseline[0]:6.1%})  "
+                  f"{seconds * 1e6:8.1f} us/response ({seconds / baseline[1]:6.1%})")
+
+if __name__ == "__main__":
+    main()
@@ -66,6 +66,16 @@ async def startup_event():
     except Exception as e:
         print(f"Error during startup: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush and close tool resources."""
+    brave_tool = tools.get("brave_search")
+    if brave_tool:
+        await brave_tool.close()
+    memory_tool = tools.get("memory")
+    if memory_tool:
+        memory_tool.store.close()
+
 @app.get("/mcp/tools")
 async def list_tools() -> List[Tool]:
     """List all available tools."""
@@ -2,7 +2,8 @@ function Search-Brave {
     param(
         [Parameter(Mandatory=$true)]
         [string]$Query,
-        [int]$Count = 10
+        [int]$Count = 10,
+        [string]$BaseUrl = $(if ($env:MCP_SERVER_URL) { $env:MCP_SERVER_URL } else { 'http://localhost:8000' })
     )
 
     $body = @{
@@ -10,10 +11,11 @@ function Search-Brave {
         count = $Count
     } | ConvertTo-Json
 
-    $result = Invoke-RestMethod -Method 'Post' -Uri 'http://localhost:8000/search' -ContentType 'application/json' -Body $body
+    $result = Invoke-RestMethod -Method 'Post' -Uri "$BaseUrl/search" -ContentType 'application/json' -Body $body
     $result.results | Format-Table title, url -Wrap
 }
 
 # Example usage:
 # Search-Brave "python programming"
 # Search-Brave -Query "javascript frameworks" -Count 5
+# Search-Brave "python" -BaseUrl http://localhost:8001  # or set $env:MCP_SERVER_URL
@@ -1,17 +1,19 @@
 import os
-import requests
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any, Union
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Literal, Union
 from enum import Enum
 from datetime import datetime
 import json
-import aiohttp
-import asyncio
-from urllib.parse import urlparse
-from memory import Memory, MemoryRequest, MemoryResponse
+from tools.brave_client import BraveSearchClient
+from tools.fetch import FetchBatchRequest, FetchError, FetchRequest, FetchResponse, FetchServer
+from tools.http_cache import HttpCache, header
+from tools.rate_limiter import Priority, RateLimitExceeded
+from tools.search_fields import parse_fields, project_response, project_results
+from tools.memory import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, MemoryFilter, MemoryStore
 
 # Load environment variables
 load_dotenv()
@@ -32,107 +34,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+MAX_BATCH_QUERIES = 50
+
 class SearchRequest(BaseModel):
     query: str
     count: Optional[int] = 10
+    priority: Literal["interactive", "background"] = "interactive"
+    fields: Optional[Union[List[str], str]] = None
+
+class SearchBatchRequest(BaseModel):
+    queries: List[str] = Field(min_length=1, max_length=MAX_BATCH_QUERIES)
+    count: Optional[int] = 10
+    priority: Literal["interactive", "background"] = "interactive"
+    fields: Optional[Union[List[str], str]] = None
 
 class SearchResponse(BaseModel):
     results: List[dict]
     total_count: int
 
-class RateLimiter:
-    def __init__(self):
-        self.per_second = 1
-        self.per_month = 15000
-        self.request_count = {
-            'second': 0,
-            'month': 0,
-            'last_reset': datetime.now().timestamp()
-        }
-
-    def check_limit(self):
-        now = datetime.now().timestamp()
-        if now - self.request_count['last_reset'] > 1:
-            self.request_count['second'] = 0
-            self.request_count['last_reset'] = now
-
-        if (self.request_count['second'] >= self.per_second or 
-            self.request_count['month'] >= self.per_month):
-            raise HTTPException(
-                status_code=429,
-                detail="Rate limit exceeded"
-            )
-
-        self.request_count['second'] += 1
-        self.request_count['month'] += 1
-
-class BraveSearchClient:
-    def __init__(self):
-        self.api_key = os.getenv("BRAVE_API_KEY")
-        if not self.api_key:
-            raise ValueError("BRAVE_API_KEY environment variable is not set")
-        self.base_url = "https://api.search.brave.com/res/v1"
-        self.headers = {
-            "Accept": "application/json",
-            "X-Subscription-Token": self.api_key
-        }
-        self.rate_limiter = RateLimiter()
-
-    async def web_search(self, query: str, count: int = 10) -> dict:
-        self.rate_limiter.check_limit()
-        params = {
-            "q": query,
-            "count": min(count, 20)
-        }
-        response = requests.get(
-            f"{self.base_url}/web/search",
-            headers=self.headers,
-            params=params
-        )
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Brave Search API error: {response.text}"
-            )
-        return response.json()
-
-    async def local_search(self, query: str, count: int = 5) -> dict:
-        self.rate_limiter.check_limit()
-        # First get location IDs
-        params = {
-            "q": query,
-            "count": min(count, 20),
-            "result_filter": "locations"
-        }
-        response = requests.get(
-            f"{self.base_url}/web/search",
-            headers=self.headers,
-            params=params
-        )
-        if response.status_code != 200:
-            return await self.web_search(query, count)  # Fallback to web search
-
-        data = response.json()
-        location_ids = [r.get('id') for r in data.get('locations', {}).get('results', []) if r.get('id')]
-        
-        if not location_ids:
-            return await self.web_search(query, count)  # Fallback to web search
-
-        # Get POI details
-        self.rate_limiter.check_limit()
-        poi_response = requests.get(
-            f"{self.base_url}/local/pois",
-            headers=self.headers,
-            params={'ids': location_ids}
-        )
-        
-        if poi_response.status_code != 200:
-            raise HTTPException(
-                status_code=poi_response.status_code,
-                detail=f"Brave Search API error: {poi_response.text}"
-            )
-            
-        return poi_response.json()
+class MemoryRequest(BaseModel):
+    key: Optional[str] = None
+    value: Optional[str] = None
+    query: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+    limit: Optional[int] = None
+    offset: int = 0
+    cursor: Optional[str] = None
+    durable: bool = False
+    filters: Optional[Dict[str, Any]] = None
+    since: Optional[str] = None
+    until: Optional[str] = None
+
+    def memory_filter(self) -> Optional[MemoryFilter]:
+        return MemoryFilter.build(self.filters, self.since, self.until)
+
+class MemoryResponse(BaseModel):
+    success: bool
+    message: Optional[str] = None
+    data: Optional[Any] = None
 
 # MCP Protocol Models
 class ToolType(str, Enum):
@@ -162,119 +101,6 @@ class MCPResponse(BaseModel):
     context: Optional[Context] = None
     metadata: Dict[str, Any] = {}
 
-# Enhanced Fetch Models
-class FetchRequest(BaseModel):
-    url: str
-    method: str = "GET"
-    headers: Optional[Dict[str, str]] = None
-    body: Optional[Union[str, Dict[str, Any]]] = None
-    timeout: Optional[int] = 30
-    follow_redirects: bool = True
-    verify_ssl: bool = True
-
-class FetchResponse(BaseModel):
-    status: int
-    headers: Dict[str, str]
-    body: str
-    url: str
-    redirect_chain: List[str] = []
-    timing: Dict[str, float] = {}
-    error: Optional[str] = None
-
-class FetchError(Exception):
-    def __init__(self, message: str, status_code: int = 500):
-        self.message = message
-        self.status_code = status_code
-        super().__init__(self.message)
-
-class FetchServer:
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.start_time: float = 0
-    
-    async def setup(self):
-        if self.session is None:
-            self.session = aiohttp.ClientSession()
-    
-    async def cleanup(self):
-        if self.session:
-            await self.session.close()
-            self.session = None
-    
-    def _validate_url(self, url: str) -> bool:
-        try:
-            result = urlparse(url)
-            return all([result.scheme in ['http', 'https'], result.netloc])
-        except:
-            return False
-    
-    def _prepare_headers(self, headers: Optional[Dict[str, str]]) -> Dict[str, str]:
-        default_headers = {
-            "User-Agent": "MCP-Fetch/1.0",
-            "Accept": "*/*"
-        }
-        if headers:
-            default_headers.update(headers)
-        return default_headers
-    
-    def _prepare_body(self, body: Optional[Union[str, Dict[str, Any]]]) -> Optional[str]:
-        if body is None:
-            return None
-        if isinstance(body, str):
-            return body
-        return json.dumps(body)
-    
-    async def fetch(self, request: FetchRequest) -> FetchResponse:
-        await self.setup()
-        
-        if not self._validate_url(request.url):
-            raise FetchError(f"Invalid URL: {request.url}", 400)
-        
-        if not self.session:
-            raise FetchError("Session not initialized", 500)
-        
-        headers = self._prepare_headers(request.headers)
-        body = self._prepare_body(request.body)
-        redirect_chain = []
-        
-        try:
-            start_time = asyncio.get_event_loop().time()
-            
-            async with self.session.request(
-                method=request.method,
-                url=request.url,
-                headers=headers,
-                data=body,
-                timeout=aiohttp.ClientTimeout(total=request.timeout),
-                allow_redirects=request.follow_redirects,
-                ssl=request.verify_ssl
-            ) as response:
-                end_time = asyncio.get_event_loop().time()
-                
-                # Get redirect history
-                if request.follow_redirects:
-                    redirect_chain = [str(h.url) for h in response.history]
-                
-                response_body = await response.text()
-                
-                return FetchResponse(
-                    status=response.status,
-                    headers=dict(response.headers),
-                    body=response_body,
-                    url=str(response.url),
-                    redirect_chain=redirect_chain,
-                    timing={
-                        "total_seconds": end_time - start_time
-                    }
-                )
-                
-        except asyncio.TimeoutError:
-            raise FetchError(f"Request timed out after {request.timeout} seconds", 408)
-        except aiohttp.ClientError as e:
-            raise FetchError(f"Request failed: {str(e)}", 500)
-        except Exception as e:
-            raise FetchError(f"Unexpected error: {str(e)}", 500)
-
 # Tool Registry
 class ToolRegistry:
     def __init__(self):
@@ -296,18 +122,23 @@ class ToolRegistry:
 tool_registry = ToolRegistry()
 brave_client = None
 fetch_server = None
-memory_store = Memory()
+memory_store = None
 
 @app.on_event("startup")
 async def startup_event():
-    global brave_client, fetch_server
+    global brave_client, fetch_server, memory_store
     
+    # Opened here rather than at import: fetch's extraction workers re-import this module.
+    memory_store = MemoryStore(
+        os.getenv("MEMORY_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory.json")
+    )
+
     try:
         # Initialize Brave Search client
         brave_client = BraveSearchClient()
         
         # Initialize fetch server
-        fetch_server = FetchServer()
+        fetch_server = FetchServer(cache=HttpCache.from_env())
         await fetch_server.setup()
         
         # Register web search tool
@@ -324,6 +155,27 @@ async def startup_event():
                     "type": "integer",
                     "description": "Number of results",
                     "default": 10
+                },
+                "queries": {
+                    "type": "array",
+                    "description": f"Batch mode: up to {MAX_BATCH_QUERIES} queries to search instead of query",
+                    "items": {"type": "string"}
+                },
+                "priority": {
+                    "type": "string",
+                    "description": "interactive, or background for prefetches that may wait",
+                    "default": "interactive"
+                },
+                "stream": {
+                    "type": "boolean",
+                    "description": "Batch mode: stream each result as NDJSON as soon as it is ready",
+                    "default": False
+                },
+                "fields": {
+                    "type": "array",
+                    "description": "Result fields to return, e.g. meta_url.hostname; [\"*\"] for the full response",
+                    "items": {"type": "string"},
+                    "default": ["title", "url", "description"]
                 }
             },
             version="1.0.0"
@@ -372,9 +224,39 @@ async def startup_event():
                     "type": "string",
                     "description": "Search query (required for search)"
                 },
+                "limit": {
+                    "type": "integer",
+                    "description": f"Page size for search and list (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})"
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "next_cursor from a previous search or list call"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Number of ranked search results to skip when no cursor is given",
+                    "default": 0
+                },
                 "metadata": {
                     "type": "object",
                     "description": "Optional metadata for the memory"
+                },
+                "filters": {
+                    "type": "object",
+                    "description": "Metadata fields and values that search and list results must match"
+                },
+                "since": {
+                    "type": "string",
+                    "description": "Only search or list memories stored at or after this ISO timestamp"
+                },
+                "until": {
+                    "type": "string",
+                    "description": "Only search or list memories stored at or before this ISO timestamp"
+                },
+                "durable": {
+                    "type": "boolean",
+                    "description": "Wait until an add or delete is written to disk",
+                    "default": False
                 }
             },
             version="1.0.0"
@@ -389,6 +271,11 @@ async def startup_event():
 async def shutdown_event():
     if fetch_server:
         await fetch_server.cleanup()
+    if brave_client:
+        await brave_client.close()
+    # Flush write-behind buffers and compact the journal
+    if memory_store:
+        memory_store.close()
 
 @app.get("/mcp/tools")
 def list_tools():
@@ -408,11 +295,24 @@ async def execute_tool(request: MCPRequest) -> MCPResponse:
 
     try:
         if tool.name == "brave_web_search":
+            priority = Priority.parse(request.parameters.get("priority", "interactive"))
+            fields = parse_fields(request.parameters.get("fields"))
+            queries = request.parameters.get("queries")
+            if queries is not None:
+                if not isinstance(queries, list) or not 0 < len(queries) <= MAX_BATCH_QUERIES:
+                    raise HTTPException(status_code=400, detail=f"queries must list 1 to {MAX_BATCH_QUERIES} queries")
+                items = projected_items(
+                    brave_client.web_search_batch(queries, request.parameters.get("count", 10), priority), fields
+                )
+                if request.parameters.get("stream"):
+                    return StreamingResponse(ndjson_items(items), media_type="application/x-ndjson")
+                return MCPResponse(result={"results": [item async for item in items]})
             results = await brave_client.web_search(
                 query=request.parameters["query"],
-                count=request.parameters.get("count", 10)
+                count=request.parameters.get("count", 10),
+                priority=priority
             )
-            return MCPResponse(result=results)
+            return MCPResponse(result=project_response(results, fields))
         elif tool.name == "brave_local_search":
             results = await brave_client.local_search(
                 query=request.parameters["query"],
@@ -425,7 +325,8 @@ async def execute_tool(request: MCPRequest) -> MCPResponse:
                 memory_store.add(
                     request.parameters["key"],
                     request.parameters["value"],
-                    request.parameters.get("metadata")
+                    request.parameters.get("metadata"),
+                    durable=request.parameters.get("durable", False)
                 )
                 return MCPResponse(result={"message": "Memory added successfully"})
             elif action == "get":
@@ -434,20 +335,39 @@ async def execute_tool(request: MCPRequest) -> MCPResponse:
                     raise HTTPException(status_code=404, detail="Memory not found")
                 return MCPResponse(result=memory)
             elif action == "search":
-                results = memory_store.search(request.parameters["query"])
-                return MCPResponse(result={"results": results})
+                results, next_cursor = memory_store.search_page(
+                    request.parameters["query"],
+                    limit=request.parameters.get("limit"),
+                    cursor=request.parameters.get("cursor"),
+                    offset=request.parameters.get("offset", 0),
+                    filters=parameter_filters(request.parameters)
+                )
+                return MCPResponse(result={"results": results, "next_cursor": next_cursor})
             elif action == "delete":
-                success = memory_store.delete(request.parameters["key"])
+                success = memory_store.delete(
+                    request.parameters["key"],
+                    durable=request.parameters.get("durable", False)
+                )
                 if not success:
                     raise HTTPException(status_code=404, detail="Memory not found")
                 return MCPResponse(result={"message": "Memory deleted successfully"})
             elif action == "list":
-                memories = memory_store.list_all()
-                return MCPResponse(result={"memories": memories})
+                memories, next_cursor = memory_store.list_page(
+                    limit=request.parameters.get("limit"),
+                    cursor=request.parameters.get("cursor"),
+                    filters=parameter_filters(request.parameters)
+                )
+                return MCPResponse(result={"memories": memories, "next_cursor": next_cursor})
             else:
                 raise HTTPException(status_code=400, detail="Invalid action")
         else:
             raise HTTPException(status_code=400, detail=f"Unknown tool: {tool.name}")
+    except HTTPException:
+        raise
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error executing tool: {e}")  # Debug log
         raise HTTPException(status_code=500, detail=str(e))
@@ -459,23 +379,134 @@ async def search(request: SearchRequest):
             status_code=500,
             detail="Brave Search client not initialized. Make sure BRAVE_API_KEY is set."
         )
-    
     try:
-        results = await brave_client.web_search(request.query, request.count)
+        fields = parse_fields(request.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        results = await brave_client.web_search(request.query, request.count, Priority.parse(request.priority))
         return SearchResponse(
-            results=results.get("web", {}).get("results", []),
+            results=project_results(results.get("web", {}).get("results", []), fields),
             total_count=results.get("web", {}).get("totalCount", 0)
         )
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/search/batch")
+async def search_batch(request: SearchBatchRequest):
+    """Run several searches at once and stream each result as NDJSON when it is ready.
+
+    Duplicate queries are searched once and cached ones are answered first.
+    Each line is ``{"query", "indexes", "results", "total_count"}``, or
+    ``{"query", "indexes", "error", "status_code"}`` for a failed search.
+    """
+    if not brave_client:
+        raise HTTPException(
+            status_code=500,
+            detail="Brave Search client not initialized. Make sure BRAVE_API_KEY is set."
+        )
+    try:
+        fields = parse_fields(request.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = brave_client.web_search_batch(request.queries, request.count, Priority.parse(request.priority))
+    return StreamingResponse(ndjson_items(search_items(items, fields)), media_type="application/x-ndjson")
+
+async def search_items(items, fields):
+    async for item in items:
+        result = item.pop("result", None)
+        if result is not None:
+            web = result.get("web", {})
+            item.update(results=project_results(web.get("results", []), fields), total_count=web.get("totalCount", 0))
+        yield item
+
+async def projected_items(items, fields):
+    async for item in items:
+        if "result" in item:
+            item["result"] = project_response(item["result"], fields)
+        yield item
+
+async def ndjson_items(items):
+    async for item in items:
+        yield json.dumps(item) + "\n"
+
+@app.post("/fetch", response_model=FetchResponse)
+async def fetch_url(request: FetchRequest):
+    """Fetch a URL. With ``stream`` the body is passed through as it arrives."""
+    if not fetch_server:
+        raise HTTPException(status_code=500, detail="Fetch server not initialized")
+    try:
+        if request.stream:
+            meta, chunks = await fetch_server.stream(request)
+            return StreamingResponse(chunks, status_code=meta.status, media_type=header(meta.headers, "content-type"),
+                                     headers={"X-Fetch-Url": meta.url})
+        return await fetch_server.fetch(request)
+    except FetchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+@app.post("/fetch/batch")
+async def fetch_batch(request: FetchBatchRequest):
+    """Fetch several URLs at once and stream each response as NDJSON when it is ready.
+
+    Each line is ``{"index", "url", "result"}`` with a FetchResponse, or
+    ``{"index", "url", "error", "status_code"}`` for a failed fetch.
+    """
+    if not fetch_server:
+        raise HTTPException(status_code=500, detail="Fetch server not initialized")
+    items = fetch_server.fetch_batch(request.requests, request.timeout, request.concurrency, request.per_host)
+    return StreamingResponse(fetch_lines(items), media_type="application/x-ndjson")
+
+async def fetch_lines(items):
+    async for item in items:
+        if "result" in item:
+            item["result"] = item["result"].model_dump()
+        yield json.dumps(item) + "\n"
+
+@app.get("/fetch/cache/stats")
+async def fetch_cache_stats():
+    """Hit, revalidation and miss counters and size of the fetch HTTP cache."""
+    if not fetch_server:
+        raise HTTPException(status_code=500, detail="Fetch server not initialized")
+    return await fetch_server.cache_stats()
+
+@app.get("/fetch/pool")
+async def fetch_pool():
+    """Connections in use, idle and waited for in the fetch connection pool."""
+    if not fetch_server:
+        raise HTTPException(status_code=500, detail="Fetch server not initialized")
+    return fetch_server.pool_stats()
+
+@app.get("/fetch/timing")
+async def fetch_timing(host: Optional[str] = None):
+    """Per-host histograms of fetch phases: total, queue, dns, connect, ttfb and transfer."""
+    if not fetch_server:
+        raise HTTPException(status_code=500, detail="Fetch server not initialized")
+    return fetch_server.timing_stats(host)
+
+@app.get("/search/cache/stats")
+async def search_cache_stats():
+    """Hit, miss and coalesce counters for the Brave result cache."""
+    if not brave_client:
+        raise HTTPException(status_code=500, detail="Brave Search client not initialized")
+    return brave_client.cache_stats()
+
+@app.get("/search/quota")
+async def search_quota():
+    """Brave requests left this month, shared by every worker."""
+    if not brave_client:
+        raise HTTPException(status_code=500, detail="Brave Search client not initialized")
+    return await brave_client.rate_limiter.remaining()
+
 @app.post("/memory/add")
 async def add_memory(request: MemoryRequest) -> MemoryResponse:
     """Add a new memory."""
     if not request.key or not request.value:
         return MemoryResponse(success=False, message="Both key and value are required")
     
-    memory_store.add(request.key, request.value, request.metadata)
+    memory_store.add(request.key, request.value, request.metadata, durable=request.durable)
     return MemoryResponse(success=True, message="Memory added successfully")
 
 @app.get("/memory/get/{key}")
@@ -492,22 +523,81 @@ async def search_memories(request: MemoryRequest) -> MemoryResponse:
     if not request.query:
         return MemoryResponse(success=False, message="Query is required")
     
-    results = memory_store.search(request.query)
-    return MemoryResponse(success=True, data={"results": results})
+    try:
+        results, next_cursor = memory_store.search_page(
+            request.query, limit=request.limit, cursor=request.cursor, offset=request.offset,
+            filters=request.memory_filter()
+        )
+    except ValueError as e:
+        return MemoryResponse(success=False, message=str(e))
+    return MemoryResponse(success=True, data={"results": results, "next_cursor": next_cursor})
+
+@app.post("/memory/search/stream")
+def stream_search_memories(request: MemoryRequest):
+    """Stream every search result as NDJSON, best match first."""
+    if not request.query:
+        raise HTTPException(status_code=400, detail="Query is required")
+    try:
+        filters = request.memory_filter()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(ndjson_lines(memory_store.iter_search(request.query, filters=filters)),
+                             media_type="application/x-ndjson")
 
 @app.delete("/memory/delete/{key}")
-async def delete_memory(key: str) -> MemoryResponse:
+async def delete_memory(key: str, durable: bool = False) -> MemoryResponse:
     """Delete a memory by key."""
-    success = memory_store.delete(key)
+    success = memory_store.delete(key, durable=durable)
     if not success:
         return MemoryResponse(success=False, message="Memory not found")
     return MemoryResponse(success=True, message="Memory deleted successfully")
 
 @app.get("/memory/list")
-async def list_memories() -> MemoryResponse:
-    """List all memories."""
-    memories = memory_store.list_all()
-    return MemoryResponse(success=True, data={"memories": memories})
+async def list_memories(limit: Optional[int] = None, cursor: Optional[str] = None,
+                        since: Optional[str] = None, until: Optional[str] = None,
+                        filter: List[str] = Query([])) -> MemoryResponse:
+    """List memories one page at a time; pass back next_cursor for the next page.
+
+    ``filter=name=value`` (repeatable) keeps memories whose metadata field
+    equals the string value; ``since``/``until`` bound the timestamp.
+    """
+    try:
+        filters = query_filters(filter, since, until)
+        memories, next_cursor = memory_store.list_page(limit=limit, cursor=cursor, filters=filters)
+    except ValueError as e:
+        return MemoryResponse(success=False, message=str(e))
+    return MemoryResponse(success=True, data={"memories": memories, "next_cursor": next_cursor})
+
+@app.get("/memory/list/stream")
+def stream_memories(since: Optional[str] = None, until: Optional[str] = None, filter: List[str] = Query([])):
+    """Stream every memory as NDJSON, one line per memory."""
+    try:
+        filters = query_filters(filter, since, until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(ndjson_lines(memory_store.iter_all(filters=filters)), media_type="application/x-ndjson")
+
+def parameter_filters(parameters: Dict[str, Any]) -> Optional[MemoryFilter]:
+    return MemoryFilter.build(parameters.get("filters"), parameters.get("since"), parameters.get("until"))
+
+def query_filters(pairs: List[str], since: Optional[str], until: Optional[str]) -> Optional[MemoryFilter]:
+    """Build a filter from ``name=value`` query parameters."""
+    metadata = {}
+    for pair in pairs:
+        name, sep, value = pair.partition("=")
+        if not sep or not name:
+            raise ValueError(f"Invalid filter: {pair}")
+        metadata[name] = value
+    return MemoryFilter.build(metadata, since, until)
+
+def ndjson_lines(pages):
+    """Serialize pages of memories to NDJSON chunks, one chunk per page.
+
+    This is a plain generator, so Starlette runs each step in its thread
+    pool and reading the store never blocks the event loop.
+    """
+    for page in pages:
+        yield "".join(json.dumps(memory.dict(), ensure_ascii=False) + "\n" for memory in page)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,88 @@
+"""FetchServer against a local origin: python -m unittest tests.test_fetch"""
+import unittest
+
+from aiohttp import web
+
+from tools.fetch import FetchRequest, FetchServer
+from tools.http_cache import HttpCache
+
+BODY = b"0123456789" * 100
+
+async def ranged(request: web.Request) -> web.Response:
+    """Serves ``BODY``, or the empty resource at /empty, honouring Range like a static file server."""
+    body = b"" if request.path == "/empty" else BODY
+    if "Range" not in request.headers:
+        return web.Response(body=body, content_type="text/plain")
+    window = request.http_range
+    start, stop = window.start or 0, min(window.stop if window.stop is not None else len(body), len(body))
+    if start >= len(body):
+        return web.Response(status=416, headers={"Content-Range": f"bytes */{len(body)}"})
+    return web.Response(status=206, body=body[start:stop], content_type="text/plain",
+                        headers={"Content-Range": f"bytes {start}-{stop - 1}/{len(body)}"})
+
+async def personal(request: web.Request) -> web.Response:
+    """A cacheable page that greets whoever the cookie names."""
+    request.app["hits"] += 1
+    return web.Response(text=f"hello {request.cookies.get('user', 'guest')}", headers={"Cache-Control": "max-age=60"})
+
+class FetchTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        app = web.Application()
+        app["hits"] = 0
+        app.router.add_get("/personal", personal)
+        app.router.add_get("/{name}", ranged)
+        self.app = app
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "127.0.0.1", 0).start()
+        self.origin = "http://127.0.0.1:{}".format(self.runner.addresses[0][1])
+        self.server = FetchServer(cache=HttpCache(":memory:"))
+
+    async def asyncTearDown(self):
+        await self.server.cleanup()
+        await self.runner.cleanup()
+
+class TruncateTest(FetchTestCase):
+    async def test_range_honouring_origin_reports_truncation(self):
+        response = await self.server.fetch(FetchRequest(url=f"{self.origin}/file", max_bytes=100, truncate=True))
+        self.assertEqual(response.status, 200)
+        self.assertTrue(response.truncated)
+        self.assertEqual(response.body, BODY[:100].decode())
+
+    async def test_small_body_is_not_truncated(self):
+        response = await self.server.fetch(FetchRequest(url=f"{self.origin}/file", max_bytes=5000, truncate=True))
+        self.assertEqual(response.status, 200)
+        self.assertFalse(response.truncated)
+        self.assertEqual(response.size, len(BODY))
+
+    async def test_empty_resource(self):
+        response = await self.server.fetch(FetchRequest(url=f"{self.origin}/empty", max_bytes=100, truncate=True))
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, "")
+        self.assertFalse(response.truncated)
+
+class CacheTest(FetchTestCase):
+    async def test_cookie_request_is_neither_stored_nor_served(self):
+        url = f"{self.origin}/personal"
+        personal = await self.server.fetch(FetchRequest(url=url, headers={"Cookie": "user=alice"}))
+        self.assertEqual((personal.body, personal.cache), ("hello alice", None))
+        anonymous = await self.server.fetch(FetchRequest(url=url))
+        self.assertEqual((anonymous.body, anonymous.cache), ("hello guest", "miss"))
+        personal = await self.server.fetch(FetchRequest(url=url, headers={"Cookie": "user=bob"}))
+        self.assertEqual((personal.body, personal.cache), ("hello bob", None))
+        self.assertEqual(self.app["hits"], 3)
+        anonymous = await self.server.fetch(FetchRequest(url=url))
+        self.assertEqual((anonymous.body, anonymous.cache), ("hello guest", "hit"))
+
+    async def test_credential_headers_and_fetch_options_bypass_cache(self):
+        url = f"{self.origin}/personal"
+        await self.server.fetch(FetchRequest(url=url))
+        for request in (FetchRequest(url=url, headers={"Proxy-Authorization": "Basic eDp5"}),
+                        FetchRequest(url=url, headers={"X-Api-Key": "secret"}),
+                        FetchRequest(url=url, follow_redirects=False),
+                        FetchRequest(url=url, verify_ssl=False)):
+            self.assertIsNone((await self.server.fetch(request)).cache)
+        self.assertEqual(self.app["hits"], 5)
+
+if __name__ == "__main__":
+    unittest.main()
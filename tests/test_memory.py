@@ -0,0 +1,50 @@
+"""Both memory backends behave alike: python -m unittest tests.test_memory"""
+import os
+import tempfile
+import unittest
+
+from tools.memory import MemoryStore
+
+class BackendTestCase(unittest.TestCase):
+    def stores(self):
+        """A fresh store per backend, closed after the test."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for backend in ("json", "sqlite"):
+            store = MemoryStore(os.path.join(directory.name, f"{backend}.json"), backend=backend)
+            self.addCleanup(store.close)
+            yield backend, store
+
+class ReplaceOrderTest(BackendTestCase):
+    def test_replaced_memory_moves_to_the_end(self):
+        orders = {}
+        for backend, store in self.stores():
+            for key in ("a", "b", "c", "d"):
+                store.add(key, f"memory {key}")
+            first, cursor = store.list_page(2)
+            store.add("a", "memory a, replaced")
+            store.add("d", "memory d, replaced")
+            rest, _ = store.list_page(10, cursor)
+            orders[backend] = ([m.key for m in store.get_all()], [m.key for m in first], [m.key for m in rest])
+            with self.subTest(backend=backend):
+                self.assertEqual(orders[backend][0], ["b", "c", "a", "d"])
+                self.assertEqual(store.get("a").content, "memory a, replaced")
+                self.assertEqual([m.key for m in store.search("replaced")], ["a", "d"])
+        self.assertEqual(orders["json"], orders["sqlite"])
+        self.assertEqual(orders["json"][1:], (["a", "b"], ["c", "a", "d"]))
+
+class IterSearchTest(BackendTestCase):
+    def test_pages_match_one_search(self):
+        for backend, store in self.stores():
+            for i in range(25):
+                store.add(f"k{i}", f"shared term {'rare ' * (i % 4)}number {i}")
+            store.add("other", "nothing in common")
+            with self.subTest(backend=backend):
+                pages = list(store.iter_search("shared rare", batch_size=10))
+                self.assertEqual([len(page) for page in pages], [10, 10, 5])
+                self.assertEqual([m.key for page in pages for m in page],
+                                 [m.key for m in store.search("shared rare")])
+                self.assertEqual(list(store.iter_search("absent", batch_size=10)), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+"""Async client for the Brave Search API."""
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+import aiohttp
+from .rate_limiter import Priority, RateLimiter, RateLimitExceeded, shared_rate_limiter
+from .search_cache import SearchCache, normalize_query
+
+DEFAULT_BASE_URL = "https://api.search.brave.com/res/v1"
+POI_CHUNK_SIZE = 20  # most ids /local/pois accepts per request
+
+class BraveAPIError(Exception):
+    def __init__(self, message: str, status_code: int = 500):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(self.message)
+
+class BraveSearchClient:
+    """Brave Search client on one long-lived aiohttp session.
+
+    The session is created on first use inside the running event loop and
+    reused for every request, so connections to the API stay open between
+    searches instead of paying a TCP and TLS handshake each time. Requests
+    never block the loop.
+
+    Settings are read from the environment:
+
+        BRAVE_BASE_URL         API root (default: the public Brave endpoint)
+        BRAVE_TIMEOUT          total seconds per request (default 10)
+        BRAVE_CONNECT_TIMEOUT  seconds to get a connection (default 3)
+        BRAVE_POOL_SIZE        open connections in total (default 20)
+        BRAVE_POOL_PER_HOST    open connections per host (default 10)
+        BRAVE_KEEPALIVE        seconds an idle connection is kept (default 30)
+        BRAVE_CACHE_TTL        seconds a result is cached, 0 disables (default 300)
+        BRAVE_CACHE_STALE_TTL  seconds an expired result may still be served
+                               while it is refreshed (default 0)
+        BRAVE_CACHE_MAX_ENTRIES / BRAVE_CACHE_MAX_BYTES  cache bounds
+                               (default 1024 entries, 16 MiB)
+        BRAVE_LOCAL_TTL        seconds a local query's location ids are cached
+                               (default 3600; Brave ids expire after ~8 hours)
+        BRAVE_POI_TTL          seconds a POI record is cached (default 3600)
+        BRAVE_POI_PARALLEL     POI chunks fetched at once (default 2)
+
+    Results are cached by normalized query and count (see
+    :class:`SearchCache`), and identical concurrent searches share one
+    upstream call, so repeats cost neither rate limit nor quota. An
+    interactive search does not wait on a background one already queued.
+
+    Every upstream request, including both steps of a local search, first
+    waits on ``rate_limiter`` (the process-wide :class:`RateLimiter` unless
+    one is passed in), so bursts queue instead of failing.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        self.api_key = api_key or os.getenv("BRAVE_API_KEY")
+        if not self.api_key:
+            raise ValueError("BRAVE_API_KEY environment variable is not set")
+        self.base_url = (base_url or os.getenv("BRAVE_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.headers = {
+            "Accept": "application/json",
+            "X-Subscription-Token": self.api_key
+        }
+        self.rate_limiter = rate_limiter or shared_rate_limiter()
+        self.timeout = aiohttp.ClientTimeout(
+            total=float(os.getenv("BRAVE_TIMEOUT", "10")),
+            connect=float(os.getenv("BRAVE_CONNECT_TIMEOUT", "3"))
+        )
+        self.pool_size = int(os.getenv("BRAVE_POOL_SIZE", "20"))
+        self.pool_per_host = int(os.getenv("BRAVE_POOL_PER_HOST", "10"))
+        self.keepalive = float(os.getenv("BRAVE_KEEPALIVE", "30"))
+        self._session: Optional[aiohttp.ClientSession] = None
+        ttl = float(os.getenv("BRAVE_CACHE_TTL", "300"))
+        self.cache: Optional[SearchCache] = SearchCache(
+            max_entries=int(os.getenv("BRAVE_CACHE_MAX_ENTRIES", "1024")),
+            max_bytes=int(os.getenv("BRAVE_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+            ttl=ttl,
+            stale_ttl=float(os.getenv("BRAVE_CACHE_STALE_TTL", "0"))
+        ) if ttl > 0 else None
+        self.local_ttl = float(os.getenv("BRAVE_LOCAL_TTL", "3600"))
+        self.poi_ttl = float(os.getenv("BRAVE_POI_TTL", "3600"))
+        self.poi_parallel = int(os.getenv("BRAVE_POI_PARALLEL", "2"))
+
+    async def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_per_host,
+                keepalive_timeout=self.keepalive
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, headers=self.headers)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get(self, path: str, params: Any, priority: int = Priority.INTERACTIVE) -> dict:
+        await self.rate_limiter.acquire(priority)
+        session = await self.session()
+        async with session.get(f"{self.base_url}{path}", params=params) as response:
+            if response.status != 200:
+                raise BraveAPIError(f"Brave Search API error: {await response.text()}", response.status)
+            return await response.json()
+
+    async def _cached(self, key: tuple, load, ttl: Optional[float] = None,
+                      priority: int = Priority.INTERACTIVE) -> dict:
+        if self.cache is None:
+            return await load()
+        return await self.cache.get(key, load, ttl, priority)
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats() if self.cache is not None else {}
+
+    async def web_search(self, query: str, count: int = 10, priority: int = Priority.INTERACTIVE) -> dict:
+        count = min(count, 20)
+        return await self._cached(
+            ("web", normalize_query(query), count),
+            lambda: self._get("/web/search", {"q": query, "count": count}, priority),
+            priority=priority
+        )
+
+    async def web_search_batch(self, queries: List[str], count: int = 10,
+                               priority: int = Priority.INTERACTIVE) -> AsyncIterator[dict]:
+        """Run several web searches at once, yielding each as it finishes.
+
+        Queries that normalize to the same text are searched once; cached
+        ones come back first and the rest queue on the rate limiter at
+        ``priority``. Each item is ``{"query", "indexes", "result"}`` or,
+        if that search failed, ``{"query", "indexes", "error", "status_code"}``
+        where ``indexes`` are the positions of the query in ``queries``.
+        """
+        positions: Dict[str, List[int]] = {}
+        for index, query in enumerate(queries):
+            positions.setdefault(normalize_query(query), []).append(index)
+        tasks = [
+            asyncio.ensure_future(self._batch_search(queries[indexes[0]], indexes, count, priority))
+            for indexes in positions.values()
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # The consumer may stop early, e.g. when a streaming client disconnects.
+            for task in tasks:
+                task.cancel()
+
+    async def _batch_search(self, query: str, indexes: List[int], count: int, priority: int) -> dict:
+        item: Dict[str, Any] = {"query": query, "indexes": indexes}
+        try:
+            item["result"] = await self.web_search(query, count, priority)
+        except (BraveAPIError, RateLimitExceeded) as e:
+            item.update(error=e.message, status_code=e.status_code)
+        except Exception as e:
+            item.update(error=str(e) or type(e).__name__, status_code=502)
+        return item
+
+    async def local_search(self, query: str, count: int = 5, priority: int = Priority.INTERACTIVE) -> dict:
+        """Local business search: the query's location ids, then their POI details.
+
+        The first response asks for web results alongside the locations. It
+        is cached per query for ``local_ttl`` seconds and each POI record for
+        ``poi_ttl``, so a repeat query whose POIs are all cached makes no
+        request at all. If the query has no locations, or none of its POIs
+        could be fetched, the web results from that first response are
+        returned instead of making another call.
+        """
+        count = min(count, 20)
+        first = await self._cached(
+            ("local", normalize_query(query), count),
+            lambda: self._get("/web/search", {"q": query, "count": count, "result_filter": "web,locations"}, priority),
+            self.local_ttl,
+            priority
+        )
+        location_ids: List[str] = [
+            r.get('id') for r in first.get('locations', {}).get('results', []) if r.get('id')
+        ]
+        if not location_ids:
+            return first  # Fall back to the web results
+        pois = await self._pois(location_ids, priority)
+        if not pois:
+            return first
+        return {"type": "local_pois", "results": pois}
+
+    async def _pois(self, location_ids: List[str], priority: int) -> List[dict]:
+        """POI records for ``location_ids``, in order; cached ones are not fetched again."""
+        found: Dict[str, dict] = {}
+        missing = []
+        for location_id in location_ids:
+            record = self.cache.lookup(("poi", location_id)) if self.cache is not None else None
+            if record is None:
+                missing.append(location_id)
+            else:
+                found[location_id] = record
+
+        semaphore = asyncio.Semaphore(self.poi_parallel)
+
+        async def fetch(chunk: List[str]) -> None:
+            async with semaphore:
+                try:
+                    data = await self._get("/local/pois", [("ids", location_id) for location_id in chunk], priority)
+                except (BraveAPIError, RateLimitExceeded, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    # One failed chunk must not discard the others or skip the fallback to the web results.
+                    print(f"Error fetching POI details: {e or type(e).__name__}")
+                    return
+            for record in data.get("results", []):
+                if record.get("id"):
+                    found[record["id"]] = record
+                    if self.cache is not None:
+                        self.cache.put(("poi", record["id"]), record, self.poi_ttl)
+
+        await asyncio.gather(*(
+            fetch(missing[i:i + POI_CHUNK_SIZE]) for i in range(0, len(missing), POI_CHUNK_SIZE)
+        ))
+        return [found[location_id] for location_id in location_ids if location_id in found]
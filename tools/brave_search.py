@@ -1,42 +1,9 @@
 import os
 from typing import Dict, Any
-from datetime import datetime
-import requests
 from .base import BaseTool, Tool, ToolType, ToolResponse
-
-class RateLimiter:
-    def __init__(self):
-        self.per_second = 1
-        self.per_month = 15000
-        self.request_count = {
-            'second': 0,
-            'month': 0,
-            'last_reset': datetime.now().timestamp()
-        }
-    
-    def check_limit(self):
-        current_time = datetime.now().timestamp()
-        
-        # Reset second counter if more than a second has passed
-        if current_time - self.request_count['last_reset'] >= 1:
-            self.request_count['second'] = 0
-            self.request_count['last_reset'] = current_time
-        
-        # Reset monthly counter at the start of each month
-        current_month = datetime.now().month
-        last_month = datetime.fromtimestamp(self.request_count['last_reset']).month
-        if current_month != last_month:
-            self.request_count['month'] = 0
-        
-        # Check limits
-        if self.request_count['second'] >= self.per_second:
-            raise Exception("Rate limit exceeded: Maximum 1 request per second")
-        if self.request_count['month'] >= self.per_month:
-            raise Exception("Rate limit exceeded: Maximum 15,000 requests per month")
-        
-        # Increment counters
-        self.request_count['second'] += 1
-        self.request_count['month'] += 1
+from .brave_client import BraveSearchClient
+from .rate_limiter import Priority, shared_rate_limiter
+from .search_fields import parse_fields, project_response
 
 class BraveSearchTool(BaseTool):
     def __init__(self):
@@ -44,12 +11,8 @@ class BraveSearchTool(BaseTool):
         self.api_key = os.getenv("BRAVE_API_KEY")
         if not self.api_key:
             raise ValueError("BRAVE_API_KEY environment variable is not set")
-        self.base_url = "https://api.search.brave.com/res/v1"
-        self.headers = {
-            "Accept": "application/json",
-            "X-Subscription-Token": self.api_key
-        }
-        self.rate_limiter = RateLimiter()
+        self.rate_limiter = shared_rate_limiter()
+        self.client = BraveSearchClient(self.api_key, rate_limiter=self.rate_limiter)
 
     def get_tool_definition(self) -> Tool:
         return Tool(
@@ -65,6 +28,22 @@ class BraveSearchTool(BaseTool):
                     "type": "integer",
                     "description": "Number of results",
                     "default": 10
+                },
+                "queries": {
+                    "type": "array",
+                    "description": "Batch mode: several queries to search instead of query",
+                    "items": {"type": "string"}
+                },
+                "priority": {
+                    "type": "string",
+                    "description": "interactive, or background for prefetches that may wait",
+                    "default": "interactive"
+                },
+                "fields": {
+                    "type": "array",
+                    "description": "Result fields to return, e.g. meta_url.hostname; [\"*\"] for the full response",
+                    "items": {"type": "string"},
+                    "default": ["title", "url", "description"]
                 }
             }
         )
@@ -72,35 +51,26 @@ class BraveSearchTool(BaseTool):
     async def execute(self, parameters: Dict[str, Any]) -> ToolResponse:
         """Execute the Brave Search tool with given parameters."""
         try:
+            priority = Priority.parse(parameters.get("priority", "interactive"))
+            fields = parse_fields(parameters.get("fields"))
+            queries = parameters.get("queries")
+            if queries:
+                results = []
+                async for item in self.client.web_search_batch(queries, parameters.get("count", 10), priority):
+                    if "result" in item:
+                        item["result"] = project_response(item["result"], fields)
+                    results.append(item)
+                return ToolResponse(result={"results": results})
+
             query = parameters.get("query")
             if not query:
                 return ToolResponse(error="Query parameter is required")
 
-            api_key = os.getenv("BRAVE_API_KEY")
-            if not api_key:
-                return ToolResponse(error="BRAVE_API_KEY environment variable is not set")
-
-            headers = {
-                "Accept": "application/json",
-                "X-Subscription-Token": api_key
-            }
-
-            self.rate_limiter.check_limit()
-            params = {
-                "q": query,
-                "count": parameters.get("count", 10)
-            }
-            
-            response = requests.get(
-                f"{self.base_url}/search",
-                headers=headers,
-                params=params
-            )
-            
-            if response.status_code != 200:
-                return ToolResponse(error=f"Brave Search API returned status {response.status_code}")
-            
-            data = response.json()
-            return ToolResponse(result=data)
+            data = await self.client.web_search(query, parameters.get("count", 10), priority)
+            return ToolResponse(result=project_response(data, fields))
         except Exception as e:
             return ToolResponse(error=str(e))
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session."""
+        await self.client.close()
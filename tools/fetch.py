@@ -0,0 +1,523 @@
+"""HTTP fetch tool shared by the MCP servers."""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Tuple, Union
+from urllib.parse import urlparse
+import asyncio
+import base64
+import codecs
+import inspect
+import json
+import multiprocessing
+import os
+import time
+
+import aiohttp
+from pydantic import BaseModel, Field
+
+from tools.fetch_timing import HostTimings, RequestTimer, trace_config
+from tools.html_extract import extract, is_html
+from tools.http_cache import CachedResponse, HttpCache, header, parse_cache_control
+
+DEFAULT_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(10 * 1024 * 1024)))
+CHUNK_SIZE = int(os.getenv("FETCH_CHUNK_SIZE", str(64 * 1024)))
+BATCH_CONCURRENCY = int(os.getenv("FETCH_BATCH_CONCURRENCY", "16"))
+BATCH_PER_HOST = int(os.getenv("FETCH_BATCH_PER_HOST", "4"))
+MAX_BATCH_FETCHES = 100
+EXTRACT_WORKERS = int(os.getenv("FETCH_EXTRACT_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+EXTRACT_NICE = 10
+
+# Request headers that do not make a response personal. A request with any other header (Cookie,
+# Authorization, an API key, Range, a validator) bypasses the shared cache.
+SHAREABLE_HEADERS = {"user-agent", "accept", "accept-language", "accept-encoding", "accept-charset", "cache-control",
+                     "pragma", "referer", "dnt"}
+
+TEXT_TYPES = ("application/json", "application/xml", "application/javascript", "application/ecmascript",
+              "application/x-www-form-urlencoded", "image/svg+xml")
+
+class FetchRequest(BaseModel):
+    url: str
+    method: str = "GET"
+    headers: Optional[Dict[str, str]] = None
+    body: Optional[Union[str, Dict[str, Any]]] = None
+    timeout: Optional[float] = 30
+    follow_redirects: bool = True
+    verify_ssl: bool = True
+    # Bytes of body to read at most; the server's FETCH_MAX_BYTES applies when unset or larger.
+    max_bytes: Optional[int] = Field(default=None, gt=0)
+    # Return the first max_bytes of a larger body instead of failing.
+    truncate: bool = False
+    # Return status and headers only, without reading the body.
+    headers_only: bool = False
+    # Pass the body through chunk by chunk instead of returning a FetchResponse (``POST /fetch`` only).
+    stream: bool = False
+    # Use the server's HTTP cache for this GET; False always asks the origin and stores nothing.
+    cache: bool = True
+    # For HTML, return the page's title, readable text and links in ``extracted`` instead of the markup.
+    extract: bool = False
+    # With ``extract``, return the text as chunks of at most this many characters.
+    chunk_size: Optional[int] = Field(default=None, gt=0)
+
+class FetchBatchRequest(BaseModel):
+    requests: List[FetchRequest] = Field(min_length=1, max_length=MAX_BATCH_FETCHES)
+    # Seconds for the whole batch; fetches still running then are reported with status 504.
+    timeout: float = Field(default=60, gt=0)
+    # Lower the server's FETCH_BATCH_CONCURRENCY / FETCH_BATCH_PER_HOST for this batch.
+    concurrency: Optional[int] = Field(default=None, gt=0)
+    per_host: Optional[int] = Field(default=None, gt=0)
+
+class ExtractedLink(BaseModel):
+    url: str
+    text: str
+
+class ExtractedPage(BaseModel):
+    title: Optional[str] = None
+    # The readable text, or None when it is returned as ``chunks``.
+    text: Optional[str] = None
+    links: List[ExtractedLink] = Field(default_factory=list)
+    chunks: Optional[List[str]] = None
+
+class FetchResponse(BaseModel):
+    status: int
+    headers: Dict[str, str]
+    body: str
+    url: str
+    redirect_chain: List[str] = Field(default_factory=list)
+    # Seconds per phase (total, queue, dns, connect, ttfb, transfer, redirect) and connection counts.
+    timing: Dict[str, float] = Field(default_factory=dict)
+    error: Optional[str] = None
+    # "text", or "base64" when the content type is binary and the body was not decoded.
+    body_encoding: str = "text"
+    size: int = 0
+    truncated: bool = False
+    # "hit" (fresh copy, origin not contacted), "revalidated" (origin answered 304) or "miss";
+    # None when the request could not use the cache.
+    cache: Optional[str] = None
+    # Set for HTML fetched with ``extract``; ``body`` is then left empty.
+    extracted: Optional[ExtractedPage] = None
+
+class FetchError(Exception):
+    def __init__(self, message: str, status_code: int = 500):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(self.message)
+
+def is_text(content_type: str) -> bool:
+    content_type = content_type.split(";")[0].strip().lower()
+    return (not content_type or content_type.startswith("text/") or content_type in TEXT_TYPES
+            or content_type.endswith("+json") or content_type.endswith("+xml"))
+
+def charset(content_type: str) -> Optional[str]:
+    """The charset of a Content-Type, or None if it has none Python can decode (e.g. utf8mb4)."""
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "charset" and value:
+            try:
+                codec = codecs.lookup(value.strip('"')).name
+                "".encode(codec)  # Rejects codecs that are not text encodings, such as base64.
+            except LookupError:
+                return None
+            return codec
+    return None
+
+class FetchServer:
+    """Fetches URLs on one aiohttp session.
+
+    Bodies are read in ``FETCH_CHUNK_SIZE`` chunks and never past the byte
+    limit, so a huge or endless response is cut off (or rejected, see
+    ``FetchRequest.truncate``) instead of being buffered whole. Binary
+    content types are returned base64-encoded rather than decoded as text.
+
+    With an ``HttpCache``, plain GETs are answered from the cache while fresh
+    and revalidated with If-None-Match / If-Modified-Since once stale.
+
+    The connection pool is configured from the environment:
+
+        FETCH_POOL_SIZE             open connections in total (default 100)
+        FETCH_POOL_PER_HOST         open connections per host (default 8)
+        FETCH_KEEPALIVE             seconds an idle connection is kept (default 30)
+        FETCH_DNS_TTL               seconds a resolved address is cached (default 300)
+        FETCH_HAPPY_EYEBALLS_DELAY  seconds before racing the next address of a
+                                    host (default 0.25; needs aiohttp 3.10+)
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, chunk_size: int = CHUNK_SIZE,
+                 cache: Optional[HttpCache] = None, batch_concurrency: int = BATCH_CONCURRENCY,
+                 batch_per_host: int = BATCH_PER_HOST):
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.batch_concurrency = batch_concurrency
+        self.batch_per_host = batch_per_host
+        self.cache = cache
+        self.cache_counts = {"hit": 0, "revalidated": 0, "miss": 0}
+        self.timings = HostTimings()
+        self.pool_size = int(os.getenv("FETCH_POOL_SIZE", "100"))
+        self.pool_per_host = int(os.getenv("FETCH_POOL_PER_HOST", "8"))
+        self.keepalive = float(os.getenv("FETCH_KEEPALIVE", "30"))
+        self.dns_ttl = int(os.getenv("FETCH_DNS_TTL", "300"))
+        self.happy_eyeballs_delay = float(os.getenv("FETCH_HAPPY_EYEBALLS_DELAY", "0.25"))
+        self.pool_counts = {"new_connections": 0, "reused_connections": 0, "waits": 0, "wait_seconds": 0.0}
+        self.extract_workers = EXTRACT_WORKERS
+        self._extract_pool: Optional[ProcessPoolExecutor] = None
+        # SQLite calls run off the event loop, one at a time.
+        self._cache_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fetch-cache")
+
+    async def setup(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(connector=self._connector(), trace_configs=[trace_config()])
+
+    def _connector(self) -> aiohttp.TCPConnector:
+        options: Dict[str, Any] = {
+            "limit": self.pool_size,
+            "limit_per_host": self.pool_per_host,
+            "keepalive_timeout": self.keepalive,
+            "ttl_dns_cache": self.dns_ttl
+        }
+        if "happy_eyeballs_delay" in inspect.signature(aiohttp.TCPConnector).parameters:
+            options["happy_eyeballs_delay"] = self.happy_eyeballs_delay or None
+        return aiohttp.TCPConnector(**options)
+
+    async def cleanup(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+        if self.cache:
+            self._cache_executor.shutdown(wait=True)
+            self.cache.close()
+            self.cache = None
+        if self._extract_pool:
+            self._extract_pool.shutdown(wait=True)
+            self._extract_pool = None
+
+    def _validate_url(self, url: str) -> bool:
+        try:
+            result = urlparse(url)
+            return all([result.scheme in ['http', 'https'], result.netloc])
+        except:
+            return False
+
+    def _prepare_headers(self, headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        default_headers = {
+            "User-Agent": "MCP-Fetch/1.0",
+            "Accept": "*/*"
+        }
+        if headers:
+            default_headers.update(headers)
+        return default_headers
+
+    def _prepare_body(self, body: Optional[Union[str, Dict[str, Any]]]) -> Optional[str]:
+        if body is None:
+            return None
+        if isinstance(body, str):
+            return body
+        return json.dumps(body)
+
+    def _limit(self, request: FetchRequest) -> int:
+        return min(request.max_bytes or self.max_bytes, self.max_bytes)
+
+    async def _open(self, request: FetchRequest) -> Tuple[aiohttp.ClientResponse, RequestTimer]:
+        """Send the request and return the response with its body still unread."""
+        await self.setup()
+
+        if not self._validate_url(request.url):
+            raise FetchError(f"Invalid URL: {request.url}", 400)
+
+        # Truncation cuts the body off while reading rather than sending Range, so the caller gets
+        # the origin's real status instead of a 206, and an empty resource instead of a 416.
+        headers = self._prepare_headers(request.headers)
+
+        timer = RequestTimer()
+        try:
+            response = await self.session.request(
+                method=request.method,
+                url=request.url,
+                headers=headers,
+                data=self._prepare_body(request.body),
+                timeout=aiohttp.ClientTimeout(total=request.timeout),
+                allow_redirects=request.follow_redirects,
+                ssl=request.verify_ssl,
+                trace_request_ctx=timer
+            )
+        except asyncio.TimeoutError:
+            raise FetchError(f"Request timed out after {request.timeout} seconds", 408)
+        except aiohttp.ClientError as e:
+            raise FetchError(f"Request failed: {str(e)}", 500)
+        return response, timer
+
+    def _response(self, request: FetchRequest, response: aiohttp.ClientResponse, timer: RequestTimer,
+                  body: bytes = b"", truncated: bool = False) -> FetchResponse:
+        redirect_chain = [str(h.url) for h in response.history] if request.follow_redirects else []
+        return self._model(response.status, dict(response.headers), str(response.url), redirect_chain,
+                           timer.timing(), body, truncated)
+
+    def _record(self, request: FetchRequest, timer: RequestTimer) -> None:
+        timer.finish()
+        self.timings.record(urlparse(request.url).netloc.lower(), timer.timing())
+        self.pool_counts["new_connections"] += timer.new_connections
+        self.pool_counts["reused_connections"] += timer.reused_connections
+        if timer.queue:
+            self.pool_counts["waits"] += 1
+            self.pool_counts["wait_seconds"] += timer.queue
+
+    def _model(self, status: int, headers: Dict[str, str], url: str, redirect_chain: List[str],
+               timing: Dict[str, float],
+               body: bytes = b"", truncated: bool = False, cache: Optional[str] = None) -> FetchResponse:
+        content_type = header(headers, "content-type") or ""
+        text = is_text(content_type)
+        return FetchResponse(
+            status=status,
+            headers=headers,
+            body=body.decode(charset(content_type) or "utf-8", errors="replace") if text
+            else base64.b64encode(body).decode("ascii"),
+            url=url,
+            redirect_chain=redirect_chain,
+            timing=timing,
+            body_encoding="text" if text else "base64",
+            size=len(body),
+            truncated=truncated,
+            cache=cache
+        )
+
+    async def _download(self, request: FetchRequest, limit: int) -> Tuple[FetchResponse, bytes]:
+        """Fetch from the origin; returns the response and its raw body."""
+        response, timer = await self._open(request)
+        try:
+            if request.headers_only:
+                self._record(request, timer)
+                return self._response(request, response, timer), b""
+
+            length = response.content_length
+            if length is not None and length > limit and not request.truncate:
+                raise FetchError(f"Response body of {length} bytes exceeds the {limit} byte limit", 413)
+
+            body = bytearray()
+            truncated = False
+            async for chunk in response.content.iter_chunked(self.chunk_size):
+                if len(body) + len(chunk) > limit:
+                    if not request.truncate:
+                        raise FetchError(f"Response body exceeds the {limit} byte limit", 413)
+                    body += chunk[:limit - len(body)]
+                    truncated = True
+                    break
+                body += chunk
+            self._record(request, timer)
+            return self._response(request, response, timer, bytes(body), truncated), bytes(body)
+        except asyncio.TimeoutError:
+            raise FetchError(f"Request timed out after {request.timeout} seconds", 408)
+        except aiohttp.ClientError as e:
+            raise FetchError(f"Request failed: {str(e)}", 500)
+        finally:
+            # Closes the connection instead of draining a body we stopped reading.
+            response.release()
+
+    async def _cache_call(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._cache_executor, func, *args)
+
+    def _use_cache(self, request: FetchRequest, headers: Mapping[str, str]) -> bool:
+        if not self.cache or not request.cache or request.method.upper() != "GET" or request.body is not None:
+            return False
+        # Entries are keyed by URL alone, so anything that changes which response comes back skips them.
+        if request.headers_only or request.truncate or not request.follow_redirects or not request.verify_ssl:
+            return False
+        if any(name.lower() not in SHAREABLE_HEADERS for name in headers):
+            return False
+        return "no-store" not in parse_cache_control(header(headers, "cache-control"))
+
+    def _from_cache(self, request: FetchRequest, entry: CachedResponse, timing: Dict[str, float],
+                    status: str) -> FetchResponse:
+        self.cache_counts[status] += 1
+        return self._model(entry.status, entry.headers, entry.url, [], timing, entry.body, cache=status)
+
+    async def fetch(self, request: FetchRequest) -> FetchResponse:
+        """Fetch ``request.url`` and return at most the byte limit of its body.
+
+        With ``request.extract`` an HTML body is parsed in a worker process
+        (``FETCH_EXTRACT_WORKERS``, default up to 4) into ``extracted``, so
+        large pages never hold up the event loop.
+        """
+        response = await self._fetch(request)
+        content_type = header(response.headers, "content-type") or ""
+        if request.extract and response.body_encoding == "text" and is_html(content_type):
+            start = time.perf_counter()
+            try:
+                page = await self._extract(response.body, response.url, request.chunk_size)
+            except Exception as e:
+                # The markup is still returned, just not extracted.
+                print(f"Error extracting {response.url}: {e}")
+                return response
+            response.timing["extract_seconds"] = time.perf_counter() - start
+            response.extracted = ExtractedPage(**page)
+            response.body = ""
+        return response
+
+    async def _extract(self, html: str, url: str, chunk_size: Optional[int]) -> Dict[str, Any]:
+        if self._extract_pool is None:
+            # Spawned rather than forked: the server already runs threads (SQLite, rate limiter).
+            # Workers run at a lower priority so that, on a busy machine, the event loop gets the CPU first
+            # (where the platform has nice; Windows does not).
+            nice = {"initializer": os.nice, "initargs": (EXTRACT_NICE,)} if hasattr(os, "nice") else {}
+            self._extract_pool = ProcessPoolExecutor(max_workers=self.extract_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"), **nice)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._extract_pool, extract, html, url, chunk_size)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool for the next page.
+            self._extract_pool = None
+            raise
+
+    async def _fetch(self, request: FetchRequest) -> FetchResponse:
+        limit = self._limit(request)
+        headers = self._prepare_headers(request.headers)
+        if not self._use_cache(request, headers):
+            response, _ = await self._download(request, limit)
+            if self.cache and request.method.upper() not in ("GET", "HEAD") and response.status < 400:
+                # A successful unsafe request makes any stored copy of the URL stale.
+                await self._cache_call(self.cache.invalidate, request.url)
+            return response
+
+        start = time.perf_counter()
+        entry = await self._cache_call(self.cache.get, request.url, headers)
+        if entry is not None and len(entry.body) > limit:
+            entry = None
+        if entry is not None and entry.fresh(time.time()) \
+                and "no-cache" not in parse_cache_control(header(headers, "cache-control")):
+            return self._from_cache(request, entry, {"total_seconds": time.perf_counter() - start}, "hit")
+
+        conditional = request
+        if entry is not None:
+            conditional = request.model_copy(update={"headers": {**(request.headers or {}), **entry.validators()}})
+        response, body = await self._download(conditional, limit)
+        if entry is not None and response.status == 304:
+            entry = await self._cache_call(self.cache.refresh, request.url, entry, response.headers)
+            return self._from_cache(request, entry, response.timing, "revalidated")
+
+        await self._cache_call(self.cache.put, request.url, response.url, response.status, response.headers, body,
+                               headers)
+        self.cache_counts["miss"] += 1
+        response.cache = "miss"
+        return response
+
+    async def fetch_batch(self, requests: List[FetchRequest], timeout: Optional[float] = None,
+                          concurrency: Optional[int] = None,
+                          per_host: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Fetch several URLs at once, yielding each response as it finishes.
+
+        At most ``concurrency`` fetches run together and at most ``per_host``
+        against any one host (both capped by the server's settings); a host
+        waiting for a slot does not hold up the others. Each item is
+        ``{"index", "url", "result"}`` or ``{"index", "url", "error",
+        "status_code"}`` where ``index`` is the request's position. Fetches
+        not finished ``timeout`` seconds after the start are cancelled and
+        reported with status 504. ``stream`` is ignored in a batch.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        running = asyncio.Semaphore(min(concurrency or self.batch_concurrency, self.batch_concurrency))
+        per_host = min(per_host or self.batch_per_host, self.batch_per_host)
+        hosts: Dict[str, asyncio.Semaphore] = {}
+        tasks = {}
+        for index, request in enumerate(requests):
+            host = urlparse(request.url).netloc.lower()
+            slot = hosts.setdefault(host, asyncio.Semaphore(per_host))
+            tasks[asyncio.ensure_future(self._batch_fetch(index, request, slot, running))] = index
+        pending = set(tasks)
+        try:
+            while pending:
+                wait = None if deadline is None else max(0.0, deadline - loop.time())
+                done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    yield task.result()
+            for task in sorted(pending, key=tasks.get):
+                task.cancel()
+                index = tasks[task]
+                yield {"index": index, "url": requests[index].url,
+                       "error": f"Batch deadline of {timeout:g} seconds passed", "status_code": 504}
+        finally:
+            # The consumer may stop early, e.g. when a streaming client disconnects.
+            for task in tasks:
+                task.cancel()
+
+    async def _batch_fetch(self, index: int, request: FetchRequest, host_slot: asyncio.Semaphore,
+                           running: asyncio.Semaphore) -> Dict[str, Any]:
+        item: Dict[str, Any] = {"index": index, "url": request.url}
+        try:
+            # Host first, so a fetch queued behind its host does not hold a global slot.
+            async with host_slot, running:
+                item["result"] = await self.fetch(request.model_copy(update={"stream": False}))
+        except FetchError as e:
+            item.update(error=e.message, status_code=e.status_code)
+        except Exception as e:
+            item.update(error=str(e) or type(e).__name__, status_code=500)
+        return item
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool settings, current use and counters since startup.
+
+        ``waits`` counts fetches that had to queue for a free connection.
+        """
+        connector = self.session.connector if self.session else None
+        acquired = getattr(connector, "_acquired", ())
+        idle = getattr(connector, "_conns", {})
+        waiters = getattr(connector, "_waiters", {})
+        opened = self.pool_counts["new_connections"] + self.pool_counts["reused_connections"]
+        return {
+            "limit": self.pool_size,
+            "limit_per_host": self.pool_per_host,
+            "keepalive_seconds": self.keepalive,
+            "dns_ttl_seconds": self.dns_ttl,
+            "in_use": len(acquired),
+            "idle": sum(len(conns) for conns in idle.values()),
+            "waiting": sum(len(queue) for queue in waiters.values()),
+            **self.pool_counts,
+            "reuse_ratio": self.pool_counts["reused_connections"] / opened if opened else 0.0
+        }
+
+    def timing_stats(self, host: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Per-host histograms of fetch phases, optionally for one host (``netloc``)."""
+        return self.timings.snapshot(host)
+
+    async def cache_stats(self) -> Dict[str, Any]:
+        """Hit, revalidation and miss counts plus the size of the HTTP cache."""
+        if not self.cache:
+            return {"enabled": False}
+        stored = await self._cache_call(self.cache.stats)
+        return {"enabled": True, **self.cache_counts, **stored}
+
+    async def stream(self, request: FetchRequest) -> Tuple[FetchResponse, AsyncIterator[bytes]]:
+        """Open ``request.url`` and return its metadata and an iterator over the body.
+
+        The iterator yields chunks as they arrive and stops after
+        ``request.max_bytes`` if set; only one chunk is held at a time. A
+        timeout or connection error after the first chunk is raised from the
+        iterator.
+        """
+        response, timer = await self._open(request)
+        meta = self._response(request, response, timer)
+        if request.headers_only:
+            response.release()
+            self._record(request, timer)
+
+        async def chunks() -> AsyncIterator[bytes]:
+            if request.headers_only:
+                return
+            sent = 0
+            try:
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    if request.max_bytes is not None and sent + len(chunk) >= request.max_bytes:
+                        yield chunk[:request.max_bytes - sent]
+                        break
+                    sent += len(chunk)
+                    yield chunk
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                print(f"Error streaming {request.url}: {e}")
+                # Propagate so the client's response is aborted rather than ending like a complete body.
+                raise
+            finally:
+                response.release()
+                self._record(request, timer)
+
+        return meta, chunks()
@@ -0,0 +1,189 @@
+"""Phase timings for fetches, collected with aiohttp's tracing hooks."""
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import time
+
+import aiohttp
+
+# Upper bounds in seconds of the histogram buckets; the last bucket is open-ended.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASES = ("total", "queue", "dns", "connect", "ttfb", "transfer")
+MAX_HOSTS = 256
+
+class RequestTimer:
+    """Timestamps for one fetch, filled in by the hooks of :func:`trace_config`.
+
+    Times are ``time.perf_counter()`` values. DNS and connect time are summed
+    over every connection opened for the request, redirects included.
+    """
+
+    __slots__ = ("start", "queue", "dns", "connect", "new_connections", "reused_connections", "redirects",
+                 "redirected_at", "headers_sent_at", "headers_at", "end", "_queue_start", "_dns_start",
+                 "_connect_start", "_dns_before")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queue = self.dns = self.connect = 0.0
+        self.new_connections = self.reused_connections = self.redirects = 0
+        self.redirected_at: Optional[float] = None
+        self.headers_sent_at: Optional[float] = None
+        self.headers_at: Optional[float] = None
+        self.end: Optional[float] = None
+        self._queue_start = self._dns_start = self._connect_start = self._dns_before = 0.0
+
+    # Trace hooks, called with the time of the event.
+    def _queued(self, now: float) -> None:
+        self._queue_start = now
+
+    def _dequeued(self, now: float) -> None:
+        self.queue += now - self._queue_start
+
+    def _connecting(self, now: float) -> None:
+        self._connect_start = now
+        self._dns_before = self.dns
+
+    def _connected(self, now: float) -> None:
+        self.new_connections += 1
+        # Name resolution happens inside connection creation; it is reported separately.
+        self.connect += now - self._connect_start - (self.dns - self._dns_before)
+
+    def _reused(self, now: float) -> None:
+        self.reused_connections += 1
+
+    def _resolving(self, now: float) -> None:
+        self._dns_start = now
+
+    def _resolved(self, now: float) -> None:
+        self.dns += now - self._dns_start
+
+    def _sent(self, now: float) -> None:
+        self.headers_sent_at = now
+
+    def _redirected(self, now: float) -> None:
+        self.redirects += 1
+        self.redirected_at = now
+
+    def _answered(self, now: float) -> None:
+        self.headers_at = now
+
+    def finish(self) -> None:
+        self.end = time.perf_counter()
+
+    def timing(self) -> Dict[str, float]:
+        """Seconds per phase as reported in ``FetchResponse.timing``.
+
+        ``total_seconds`` runs from the start of the request to the end of
+        the body (or to the response headers if the body was not read).
+        ``connect_seconds`` covers TCP and, for https, the TLS handshake of
+        new connections; ``ttfb_seconds`` is from sending the final request
+        to its response headers and ``redirect_seconds`` the time spent
+        before the final hop.
+        """
+        headers_at = self.headers_at or self.end or time.perf_counter()
+        end = self.end or headers_at
+        sent_at = self.headers_sent_at or self.start
+        return {
+            "total_seconds": end - self.start,
+            "queue_seconds": self.queue,
+            "dns_seconds": self.dns,
+            "connect_seconds": self.connect,
+            "ttfb_seconds": max(0.0, headers_at - sent_at),
+            "transfer_seconds": end - headers_at,
+            "redirect_seconds": (self.redirected_at - self.start) if self.redirected_at else 0.0,
+            "redirects": float(self.redirects),
+            "new_connections": float(self.new_connections),
+            "reused_connections": float(self.reused_connections),
+        }
+
+def trace_config() -> aiohttp.TraceConfig:
+    """A TraceConfig that records phases into the ``RequestTimer`` passed as ``trace_request_ctx``."""
+    config = aiohttp.TraceConfig()
+
+    def hook(signal, record):
+        async def callback(session, context, params):
+            timer = context.trace_request_ctx
+            if isinstance(timer, RequestTimer):
+                record(timer, time.perf_counter())
+        signal.append(callback)
+
+    hook(config.on_connection_queued_start, RequestTimer._queued)
+    hook(config.on_connection_queued_end, RequestTimer._dequeued)
+    hook(config.on_connection_create_start, RequestTimer._connecting)
+    hook(config.on_connection_create_end, RequestTimer._connected)
+    hook(config.on_connection_reuseconn, RequestTimer._reused)
+    hook(config.on_dns_resolvehost_start, RequestTimer._resolving)
+    hook(config.on_dns_resolvehost_end, RequestTimer._resolved)
+    hook(config.on_request_headers_sent, RequestTimer._sent)
+    hook(config.on_request_redirect, RequestTimer._redirected)
+    hook(config.on_request_end, RequestTimer._answered)
+    return config
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (the maximum for the last bucket)."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_seconds": self.sum / self.count if self.count else 0.0,
+            "p50_seconds": self.quantile(0.5),
+            "p90_seconds": self.quantile(0.9),
+            "p99_seconds": self.quantile(0.99),
+            "max_seconds": self.max,
+            "buckets": {**{f"{bound:g}": n for bound, n in zip(BUCKETS, self.counts)}, "+Inf": self.counts[-1]},
+        }
+
+class HostTimings:
+    """Per-host phase histograms with fixed buckets, for the most recent ``max_hosts`` hosts.
+
+    DNS and connect are only observed for requests that opened a connection,
+    so reused connections do not drag those distributions to zero.
+    """
+
+    def __init__(self, max_hosts: int = MAX_HOSTS):
+        self.max_hosts = max_hosts
+        self._hosts: "OrderedDict[str, Dict[str, Histogram]]" = OrderedDict()
+
+    def record(self, host: str, timing: Dict[str, float]) -> None:
+        phases = self._hosts.get(host)
+        if phases is None:
+            phases = self._hosts[host] = {phase: Histogram() for phase in PHASES}
+            if len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+        else:
+            self._hosts.move_to_end(host)
+        for phase in PHASES:
+            if phase in ("dns", "connect") and not timing.get("new_connections"):
+                continue
+            seconds = timing.get(f"{phase}_seconds")
+            if seconds is not None:
+                phases[phase].observe(seconds)
+
+    def snapshot(self, host: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        hosts: List[str] = [host] if host is not None else list(self._hosts)
+        return {
+            name: {phase: histogram.snapshot() for phase, histogram in self._hosts[name].items()}
+            for name in hosts if name in self._hosts
+        }
@@ -0,0 +1,167 @@
+"""Readable text, title and links from fetched HTML."""
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin
+import re
+
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+# Never rendered: neither text nor links are taken from inside these.
+HIDDEN_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "head"}
+# Page furniture: links are kept, text is dropped.
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside", "form", "menu", "dialog", "button", "select"}
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "menu", "dialog"}
+# Tags whose text is the main content when the page has any.
+MAIN_TAGS = {"main", "article"}
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "br", "li", "ul", "ol", "dl", "dt", "dd", "tr", "table",
+              "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "figure", "figcaption", "hr", "address"}
+# Allowed in <head>; any other start tag (or <body>) ends an unclosed head, as browsers do.
+HEAD_TAGS = {"title", "meta", "link", "base", "script", "style", "noscript", "template"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source",
+             "track", "wbr"}
+
+SPACE_RE = re.compile(r"[ \t\r\f\v\xa0]+")
+BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+def is_html(content_type: str) -> bool:
+    return content_type.split(";")[0].strip().lower() in HTML_TYPES
+
+class _PageParser(HTMLParser):
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title: List[str] = []
+        self.text: List[str] = []
+        self.main_text: List[str] = []
+        self.links: Dict[str, List[str]] = {}
+        # Open elements as (tag, hidden, boilerplate, main) so end tags can unwind them.
+        self._stack: List[Tuple[str, bool, bool, bool]] = []
+        self._hidden = self._boilerplate = self._main = 0
+        self._in_head = self._body = self._in_title = False
+        self._link: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag == "head":
+            if self._body:
+                return  # A stray <head> in the body is ignored.
+            self._in_head = True
+        elif tag not in HEAD_TAGS and tag != "html":
+            if self._in_head:
+                self._close("head")
+            self._body = True
+        if tag == "title":
+            self._in_title = True
+        if tag == "base" and attributes.get("href"):
+            self.base_url = urljoin(self.base_url, attributes["href"])
+        if tag in BLOCK_TAGS:
+            self._newline()
+        if tag in VOID_TAGS:
+            return
+        hidden = tag in HIDDEN_TAGS or "hidden" in attributes or attributes.get("aria-hidden") == "true"
+        boilerplate = tag in BOILERPLATE_TAGS or attributes.get("role") in BOILERPLATE_ROLES
+        main = tag in MAIN_TAGS or attributes.get("role") == "main"
+        self._stack.append((tag, hidden, boilerplate, main))
+        self._hidden += hidden
+        self._boilerplate += boilerplate
+        self._main += main
+        if tag == "a" and not self._hidden:
+            href = (attributes.get("href") or "").strip()
+            if href and not href.lower().startswith(("javascript:", "mailto:", "tel:", "data:", "#")):
+                url = urldefrag(urljoin(self.base_url, href))[0]
+                if url not in self.links:
+                    # Repeats (the same link in nav and footer) keep the first link's text.
+                    self.links[url] = []
+                    self._link = url
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if tag == "a":
+            self._link = None
+        if tag in BLOCK_TAGS:
+            self._newline()
+        self._close(tag)
+
+    def _close(self, tag: str):
+        # Close up to the matching start tag; unclosed children end with it.
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                for _, hidden, boilerplate, main in self._stack[depth:]:
+                    self._hidden -= hidden
+                    self._boilerplate -= boilerplate
+                    self._main -= main
+                del self._stack[depth:]
+                if tag == "head":
+                    self._in_head = self._in_title = False
+                    self._body = True
+                break
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title.append(data)
+            return
+        if self._hidden:
+            return
+        if self._link is not None:
+            self.links[self._link].append(data)
+        if self._boilerplate:
+            return
+        self.text.append(data)
+        if self._main:
+            self.main_text.append(data)
+
+    def _newline(self):
+        if not self._hidden and not self._boilerplate:
+            self.text.append("\n")
+            if self._main:
+                self.main_text.append("\n")
+
+def clean_text(parts: List[str]) -> str:
+    text = SPACE_RE.sub(" ", "".join(parts))
+    lines = (line.strip() for line in text.split("\n"))
+    return BLANK_LINES_RE.sub("\n\n", "\n".join(line for line in lines if line)).strip()
+
+def chunk_text(text: str, size: int) -> List[str]:
+    """Split ``text`` into pieces of at most ``size`` characters, at line breaks where possible."""
+    chunks: List[str] = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > size:
+            cut = line.rfind(" ", 0, size + 1)
+            cut = cut if cut > 0 else size
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:cut].rstrip())
+            line = line[cut:].lstrip()
+        if current and len(current) + 1 + len(line) > size:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
+
+def extract(html: str, base_url: str = "", chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """Title, readable text and links of an HTML page.
+
+    Scripts, styles and hidden elements are skipped, and the text of page
+    furniture (nav, header, footer, aside, forms) is dropped. If the page
+    marks its content with ``<main>`` or ``<article>``, only that text is
+    kept. Links are made absolute and deduplicated, in page order. With
+    ``chunk_size``, the text is returned split into chunks of at most that
+    many characters instead of whole.
+    """
+    parser = _PageParser(base_url)
+    parser.feed(html)
+    parser.close()
+    main = clean_text(parser.main_text)
+    text = main or clean_text(parser.text)
+    return {
+        "title": " ".join("".join(parser.title).split()) or None,
+        "text": None if chunk_size else text,
+        "links": [{"url": url, "text": " ".join("".join(parts).split())} for url, parts in parser.links.items()],
+        "chunks": chunk_text(text, chunk_size) if chunk_size else None
+    }
@@ -0,0 +1,223 @@
+"""On-disk HTTP cache for the fetch tool."""
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fetch_cache.db")
+CACHEABLE_STATUSES = {200, 203}
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_SECONDS = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    vary TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+"""
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+def http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+def freshness_lifetime(headers: Mapping[str, str], now: float) -> float:
+    """Seconds a response stays fresh, from Cache-Control, Expires or Last-Modified."""
+    directives = parse_cache_control(header(headers, "cache-control"))
+    if "no-cache" in directives:
+        return 0.0
+    if directives.get("max-age") is not None:
+        try:
+            return max(0.0, float(directives["max-age"]))
+        except ValueError:
+            return 0.0
+    date = http_date(header(headers, "date")) or now
+    expires = header(headers, "expires")
+    if expires is not None:
+        # An invalid Expires, such as "0", means already expired.
+        return max(0.0, (http_date(expires) or 0.0) - date)
+    last_modified = http_date(header(headers, "last-modified"))
+    if last_modified is not None and last_modified < date:
+        return min(HEURISTIC_MAX_SECONDS, (date - last_modified) * HEURISTIC_FRACTION)
+    return 0.0
+
+def storable(status: int, headers: Mapping[str, str]) -> bool:
+    if status not in CACHEABLE_STATUSES:
+        return False
+    if "no-store" in parse_cache_control(header(headers, "cache-control")):
+        return False
+    return header(headers, "vary") != "*"
+
+class CachedResponse:
+    __slots__ = ("url", "status", "headers", "body", "stored_at", "expires_at")
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes, stored_at: float,
+                 expires_at: float):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    def fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers that revalidate this response."""
+        conditions = {}
+        etag = header(self.headers, "etag")
+        if etag:
+            conditions["If-None-Match"] = etag
+        last_modified = header(self.headers, "last-modified")
+        if last_modified:
+            conditions["If-Modified-Since"] = last_modified
+        return conditions
+
+class HttpCache:
+    """Private HTTP cache of GET responses in one SQLite file.
+
+    Responses are stored with their headers and kept while their total body
+    size fits in ``max_bytes``; the least recently used are evicted first.
+    Freshness follows Cache-Control (max-age, no-cache, no-store), Expires
+    and, failing those, a heuristic from Last-Modified. A stale response is
+    kept as long as it has an ETag or Last-Modified to revalidate with.
+    The store survives restarts and can be shared by several processes.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional["HttpCache"]:
+        """The cache configured by FETCH_CACHE_PATH / FETCH_CACHE_MAX_BYTES, or None if disabled."""
+        max_bytes = int(os.getenv("FETCH_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+        if max_bytes <= 0:
+            return None
+        return cls(os.getenv("FETCH_CACHE_PATH") or DEFAULT_CACHE_PATH, max_bytes)
+
+    @staticmethod
+    def _vary(response_headers: Mapping[str, str], request_headers: Mapping[str, str]) -> Dict[str, Optional[str]]:
+        names = [name.strip().lower() for name in (header(response_headers, "vary") or "").split(",") if name.strip()]
+        return {name: header(request_headers, name) for name in names}
+
+    def get(self, key: str, request_headers: Mapping[str, str]) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, vary, body, stored_at, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            url, status, headers, vary, body, stored_at, expires_at = row
+            if any(header(request_headers, name) != value for name, value in json.loads(vary).items()):
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return CachedResponse(url, status, json.loads(headers), body, stored_at, expires_at)
+
+    def put(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes,
+            request_headers: Mapping[str, str]) -> Optional[CachedResponse]:
+        """Store a response if HTTP allows it and it can be reused; returns the stored entry."""
+        now = time.time()
+        if not storable(status, headers) or len(body) > self.max_bytes // 4:
+            return None
+        entry = CachedResponse(url, status, headers, body, now, self._expires_at(headers, now))
+        if not entry.fresh(now) and not entry.validators():
+            return None
+        vary = json.dumps(self._vary(headers, request_headers))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, url, status, headers, vary, body, size, stored_at, "
+                    "expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, url, status, json.dumps(headers), vary, body, len(body), now, entry.expires_at, now)
+                )
+                self._evict()
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return entry
+
+    def refresh(self, key: str, entry: CachedResponse, headers: Mapping[str, str]) -> CachedResponse:
+        """Apply a 304 Not Modified: merge its headers and restart the freshness clock."""
+        now = time.time()
+        merged = {name: value for name, value in entry.headers.items()
+                  if header(headers, name.lower()) is None}
+        merged.update((name, value) for name, value in headers.items() if name.lower() != "content-length")
+        refreshed = CachedResponse(entry.url, entry.status, merged, entry.body, now, self._expires_at(merged, now))
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET headers = ?, stored_at = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                (json.dumps(merged), now, refreshed.expires_at, now, key)
+            )
+        return refreshed
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    @staticmethod
+    def _expires_at(headers: Mapping[str, str], now: float) -> float:
+        try:
+            age = float(header(headers, "age") or 0)
+        except ValueError:
+            age = 0.0
+        return now + freshness_lifetime(headers, now) - age
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        self._conn.close()
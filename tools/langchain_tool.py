@@ -1,4 +1,11 @@
 from typing import Any, Dict, Optional, List
+import asyncio
+import json
+import os
+import re
+import threading
+import uuid
+
 from tools.base import BaseTool, Tool, ToolType, ToolResponse
 
 from langchain.tools import Tool as LangChainTool
@@ -13,18 +20,38 @@ from langchain_community.document_loaders import (
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+import faiss
 from langchain.memory import ConversationBufferMemory
 from langchain_community.tools.python.tool import PythonREPLTool
 from langchain.chains import RetrievalQA
 
+DEFAULT_VECTOR_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vector_stores")
+STORE_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+INDEX_FILE = "index.faiss"  # Stores saved before docstore.json named its index file.
+DOCSTORE_FILE = "docstore.json"
+
 
 class LangChainToolWrapper(BaseTool):
-    """Tool for executing LangChain tools."""
+    """Tool for executing LangChain tools.
+
+    Vector stores are saved under ``VECTOR_STORE_DIR`` (default
+    ``vector_stores/`` next to the project) as soon as they are created,
+    one directory per store name: the FAISS index plus a JSON docstore with
+    each chunk's text, metadata, the embedding model used and the name of
+    the index file it belongs to. After a
+    restart a store is loaded on its first ``vector_search``, memory-mapped
+    where the index type allows, so no document is embedded again.
+    """
 
-    def __init__(self):
+    def __init__(self, store_dir: Optional[str] = None):
         super().__init__()
         self._tools_cache: Dict[str, LangChainBaseTool] = {}
         self._vector_stores: Dict[str, Any] = {}
+        self._store_dir = store_dir or os.getenv("VECTOR_STORE_DIR") or DEFAULT_VECTOR_STORE_DIR
+        self._load_lock = asyncio.Lock()
+        self._save_lock = threading.Lock()
         self._conversation_memory = ConversationBufferMemory()
         self._text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
@@ -85,19 +112,89 @@ class LangChainToolWrapper(BaseTool):
         documents = loader.load()
         return self._text_splitter.split_documents(documents)
 
+    def _store_path(self, store_name: str) -> str:
+        if not STORE_NAME_RE.match(store_name) or store_name in (".", ".."):
+            raise ValueError(f"Invalid store name: {store_name}")
+        return os.path.join(self._store_dir, store_name)
+
     async def _create_vector_store(self, documents: List[Any], store_name: str):
-        """Create a vector store from documents."""
+        """Create a vector store from documents and save it to disk."""
+        path = self._store_path(store_name)
         embeddings = OpenAIEmbeddings()
         vector_store = FAISS.from_documents(documents, embeddings)
         self._vector_stores[store_name] = vector_store
+        await asyncio.get_running_loop().run_in_executor(None, self._save_vector_store, vector_store, path,
+                                                         embeddings.model)
         return vector_store
 
+    def _save_vector_store(self, vector_store: Any, path: str, embedding_model: str) -> None:
+        """Write the index under a new name, then switch the docstore to it in one step.
+
+        Replacing docstore.json is the only commit point, so a reader never
+        pairs a new index with an old docstore or the other way round.
+        """
+        os.makedirs(path, exist_ok=True)
+        ids = [vector_store.index_to_docstore_id[i] for i in range(vector_store.index.ntotal)]
+        documents = []
+        for doc_id in ids:
+            document = vector_store.docstore.search(doc_id)
+            documents.append({"id": doc_id, "page_content": document.page_content, "metadata": document.metadata})
+        index_file = f"index-{uuid.uuid4().hex}.faiss"
+        with self._save_lock:
+            faiss.write_index(vector_store.index, os.path.join(path, index_file))
+            docstore_path = os.path.join(path, DOCSTORE_FILE)
+            with open(docstore_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"embedding_model": embedding_model, "index_file": index_file, "documents": documents},
+                          f, default=str)
+            os.replace(docstore_path + ".tmp", docstore_path)
+            for name in os.listdir(path):
+                if name.endswith(".faiss") and name != index_file:
+                    try:
+                        os.remove(os.path.join(path, name))
+                    except OSError:
+                        pass  # Still mapped by a reader on Windows; the next save removes it.
+
+    def _load_vector_store(self, path: str) -> Any:
+        """Read a saved store back; the vectors are not recomputed."""
+        with open(os.path.join(path, DOCSTORE_FILE), encoding="utf-8") as f:
+            saved = json.load(f)
+        index_path = os.path.join(path, saved.get("index_file", INDEX_FILE))
+        # FAISS.from_documents builds flat indexes, which FAISS can map instead of read since 1.8 (IO_FLAG_MMAP_IFC).
+        mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        try:
+            index = faiss.read_index(index_path, mmap_flag | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            index = faiss.read_index(index_path)
+        documents = saved["documents"]
+        if index.ntotal != len(documents):
+            raise ValueError(f"Vector store at {path} is inconsistent: "
+                             f"{index.ntotal} vectors for {len(documents)} documents")
+        docstore = InMemoryDocstore({
+            doc["id"]: Document(page_content=doc["page_content"], metadata=doc["metadata"]) for doc in documents
+        })
+        return FAISS(
+            embedding_function=OpenAIEmbeddings(model=saved["embedding_model"]),
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id={i: doc["id"] for i, doc in enumerate(documents)}
+        )
+
+    async def _get_vector_store(self, store_name: str) -> Any:
+        if store_name in self._vector_stores:
+            return self._vector_stores[store_name]
+        path = self._store_path(store_name)
+        async with self._load_lock:
+            if store_name not in self._vector_stores:
+                if not os.path.exists(os.path.join(path, DOCSTORE_FILE)):
+                    raise ValueError(f"Vector store '{store_name}' not found")
+                self._vector_stores[store_name] = await asyncio.get_running_loop().run_in_executor(
+                    None, self._load_vector_store, path
+                )
+        return self._vector_stores[store_name]
+
     async def _vector_search(self, query: str, store_name: str, k: int = 4) -> List[str]:
-        """Search the vector store for relevant documents."""
-        if store_name not in self._vector_stores:
-            raise ValueError(f"Vector store '{store_name}' not found")
-        
-        vector_store = self._vector_stores[store_name]
+        """Search the vector store for relevant documents, loading it from disk on first use."""
+        vector_store = await self._get_vector_store(store_name)
         results = vector_store.similarity_search(query, k=k)
         return [doc.page_content for doc in results]
 
@@ -1,62 +1,1218 @@
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Set, Tuple
+from array import array
+import base64
+import bisect
+import hashlib
+import heapq
 import json
+import math
 import os
-from datetime import datetime
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
 from pydantic import BaseModel
 from .base import BaseTool, Tool, ToolType, ToolResponse
+from .memory_snapshot import BinarySnapshot, is_binary_snapshot, write_snapshot
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
 
 class Memory(BaseModel):
+    key: str = ""
     content: str
     metadata: Dict[str, Any] = {}
     timestamp: str = ""
 
-class MemoryStore:
-    def __init__(self, storage_path: str = "memory.json"):
+class MemoryFilter(BaseModel):
+    """Restricts search and list results.
+
+    ``metadata`` matches memories whose metadata has each given field equal
+    to the given value; ``since`` and ``until`` are inclusive ISO timestamp
+    bounds. All conditions must hold.
+    """
+    metadata: Dict[str, Any] = {}
+    since: Optional[str] = None
+    until: Optional[str] = None
+
+    @classmethod
+    def build(cls, metadata: Optional[Dict[str, Any]] = None, since: Optional[str] = None,
+              until: Optional[str] = None) -> Optional["MemoryFilter"]:
+        """Return a filter, or ``None`` when no condition is given.
+
+        Raises ``ValueError`` for a bound that is not an ISO timestamp.
+        """
+        if not metadata and not since and not until:
+            return None
+        for bound in (since, until):
+            if bound:
+                to_epoch(bound)
+        return cls(metadata=metadata or {}, since=since or None, until=until or None)
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """Pack pagination state into an opaque, URL-safe cursor string."""
+    raw = json.dumps(state, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(state, dict):
+        raise ValueError("Invalid cursor")
+    return state
+
+def page_size(limit: Optional[int]) -> int:
+    """Clamp a requested page size to ``1..MAX_PAGE_SIZE``."""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+def to_epoch(timestamp: str) -> float:
+    """Convert an ISO timestamp (naive means UTC) to epoch seconds; ``""`` maps to NaN."""
+    if not timestamp:
+        return math.nan
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+def to_iso(epoch: float) -> str:
+    """Inverse of :func:`to_epoch`, producing the naive UTC form the store writes."""
+    if math.isnan(epoch):
+        return ""
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None).isoformat()
+
+class MemoryColumns:
+    """Column-oriented storage for memory records, addressed by slot.
+
+    Each field lives in its own list instead of one pydantic object per
+    memory: timestamps are epoch floats in a packed ``array('d')``, empty
+    metadata is stored as ``None`` and metadata keys are interned so
+    repeated field names share one string. Rows are only ever appended, so
+    a slot keeps its record until the columns are packed into a new copy.
+    :class:`Memory` objects are only built by :meth:`memory`.
+    """
+
+    __slots__ = ("keys", "contents", "metadata", "timestamps")
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self.contents: List[str] = []
+        self.metadata: List[Optional[Dict[str, Any]]] = []
+        self.timestamps = array('d')
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @staticmethod
+    def _compact_metadata(metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not metadata:
+            return None
+        return {sys.intern(name): value for name, value in metadata.items()}
+
+    def append(self, key: str, content: str, metadata: Optional[Dict[str, Any]], timestamp: float) -> int:
+        # The key goes last: readers bound slots by len(keys), so a row
+        # becomes addressable only once every column has it.
+        self.contents.append(content)
+        self.metadata.append(self._compact_metadata(metadata))
+        self.timestamps.append(timestamp)
+        self.keys.append(key)
+        return len(self.keys) - 1
+
+    def find(self, key: str) -> Optional[int]:
+        """Slot of ``key`` among records not tracked by the caller's key index."""
+        return None
+
+    def key(self, slot: int) -> Optional[str]:
+        return self.keys[slot] if 0 <= slot < len(self.keys) else None
+
+    def content(self, slot: int) -> str:
+        return self.contents[slot]
+
+    def row(self, slot: int) -> Tuple[str, str, Optional[Dict[str, Any]], float]:
+        return self.keys[slot], self.contents[slot], self.metadata[slot], self.timestamps[slot]
+
+    def record(self, slot: int) -> Dict[str, Any]:
+        """Plain dict in the snapshot/journal layout."""
+        key, content, metadata, timestamp = self.row(slot)
+        return {
+            "key": key,
+            "content": content,
+            "metadata": dict(metadata or {}),
+            "timestamp": to_iso(timestamp),
+        }
+
+    def memory(self, slot: int) -> Memory:
+        return Memory(**self.record(slot))
+
+    def pack(self, slots: Iterable[int]) -> Tuple["MemoryColumns", Dict[int, int]]:
+        """Copy ``slots`` into new in-memory columns; returns them and the old -> new slot mapping."""
+        packed = MemoryColumns()
+        mapping: Dict[int, int] = {}
+        for slot in slots:
+            mapping[slot] = len(packed)
+            key, content, metadata, timestamp = self.row(slot)
+            packed.contents.append(content)
+            packed.metadata.append(metadata)
+            packed.timestamps.append(timestamp)
+            packed.keys.append(key)
+        return packed, mapping
+
+class SnapshotColumns(MemoryColumns):
+    """Columns whose first slots are read lazily from a :class:`BinarySnapshot`.
+
+    Slots below ``len(snapshot)`` belong to the snapshot; rows appended since
+    it was written are held in the inherited lists, offset by the snapshot
+    size.
+    """
+
+    __slots__ = ("snapshot", "base")
+
+    def __init__(self, snapshot: BinarySnapshot):
+        super().__init__()
+        self.snapshot = snapshot
+        self.base = len(snapshot)
+
+    def __len__(self) -> int:
+        return self.base + len(self.keys)
+
+    def append(self, key: str, content: str, metadata: Optional[Dict[str, Any]], timestamp: float) -> int:
+        return self.base + super().append(key, content, metadata, timestamp)
+
+    def find(self, key: str) -> Optional[int]:
+        return self.snapshot.find(key)
+
+    def key(self, slot: int) -> Optional[str]:
+        if slot >= self.base:
+            return super().key(slot - self.base)
+        return self.snapshot.key(slot) if slot >= 0 else None
+
+    def content(self, slot: int) -> str:
+        if slot >= self.base:
+            return self.contents[slot - self.base]
+        return self.snapshot.content(slot)
+
+    def row(self, slot: int) -> Tuple[str, str, Optional[Dict[str, Any]], float]:
+        if slot >= self.base:
+            return super().row(slot - self.base)
+        return self.snapshot.row(slot)
+
+    def close(self) -> None:
+        self.snapshot.close()
+
+class InvertedIndex:
+    """Token -> posting list index over memory slots, ranked with BM25.
+
+    Postings map a slot to the term frequency in that memory, so a query only
+    touches the postings of its own terms rather than the whole corpus.
+
+    Postings only grow: :meth:`retire` takes a slot out of the BM25
+    statistics but leaves it in the postings, so searches against an older
+    :class:`MemoryView` still find it. Retired slots are dropped when the
+    store builds a :meth:`remapped` copy.
+    """
+
+    TOKEN_RE = re.compile(r"\w+")
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.doc_freq: Dict[str, int] = {}
+        self.doc_count = 0
+        self.total_length = 0
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        return cls.TOKEN_RE.findall(text.lower())
+
+    def add(self, slot: int, text: str) -> None:
+        tokens = self.tokenize(text)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        # Length first: a reader that finds the slot in a posting looks it up.
+        self.doc_lengths[slot] = len(tokens)
+        for token, tf in counts.items():
+            self.postings.setdefault(token, {})[slot] = tf
+            self.doc_freq[token] = self.doc_freq.get(token, 0) + 1
+        self.doc_count += 1
+        self.total_length += len(tokens)
+
+    def retire(self, slot: int, text: str) -> None:
+        """Stop counting a deleted slot in the ranking statistics."""
+        for token in set(self.tokenize(text)):
+            remaining = self.doc_freq.get(token, 0) - 1
+            if remaining > 0:
+                self.doc_freq[token] = remaining
+            else:
+                self.doc_freq.pop(token, None)
+        self.doc_count -= 1
+        self.total_length -= self.doc_lengths.get(slot, 0)
+
+    def remapped(self, slots: Dict[int, int]) -> "InvertedIndex":
+        """Return a copy renumbered by ``slots``; slots missing from it are dropped."""
+        index = InvertedIndex(self.k1, self.b)
+        for token, posting in self.postings.items():
+            kept = {slots[slot]: tf for slot, tf in posting.items() if slot in slots}
+            if kept:
+                index.postings[token] = kept
+                index.doc_freq[token] = len(kept)
+        index.doc_lengths = {slots[slot]: length for slot, length in self.doc_lengths.items() if slot in slots}
+        index.doc_count = len(index.doc_lengths)
+        index.total_length = sum(index.doc_lengths.values())
+        return index
+
+    def search(self, query: str, limit: Optional[int] = None, offset: int = 0,
+               allowed: Optional[Set[int]] = None,
+               visible: Optional[Callable[[int], bool]] = None) -> List[Tuple[int, float]]:
+        """Return ``(slot, score)`` pairs, best first.
+
+        ``allowed`` restricts scoring to those slots; when it is smaller than
+        a posting list only the allowed slots are looked up in it.
+        ``visible`` drops slots the caller's view cannot see.
+        """
+        n_docs = self.doc_count
+        if n_docs <= 0:
+            return []
+        avg_length = self.total_length / n_docs or 1.0
+        scores: Dict[int, float] = {}
+        for token in set(self.tokenize(query)):
+            df = self.doc_freq.get(token)
+            posting = self.postings.get(token)
+            if not df or not posting:
+                continue
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            if allowed is None:
+                # Copy so a concurrent add cannot resize the dict mid-iteration.
+                matches = posting.copy().items()
+            elif len(allowed) < len(posting):
+                matches = ((slot, posting[slot]) for slot in allowed if slot in posting)
+            else:
+                matches = ((slot, tf) for slot, tf in posting.copy().items() if slot in allowed)
+            for slot, tf in matches:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[slot] / avg_length)
+                scores[slot] = scores.get(slot, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        if visible is not None:
+            scores = {slot: score for slot, score in scores.items() if visible(slot)}
+
+        # Ties keep insertion order, which is what the old substring scan returned.
+        rank = lambda item: (item[1], -item[0])
+        if limit is None:
+            ranked = sorted(scores.items(), key=rank, reverse=True)
+            return ranked[offset:]
+        return heapq.nlargest(offset + limit, scores.items(), key=rank)[offset:]
+
+class AttributeIndex:
+    """Secondary indexes over memory metadata and timestamps.
+
+    Each declared metadata field gets a hash index from value to slots, and
+    every slot with a timestamp is kept in a list sorted by ``(epoch, slot)``
+    so a time range is two bisections. Filters on fields that were not
+    declared are handed back to the caller to check row by row.
+
+    Like :class:`InvertedIndex` it only grows; deleted slots are filtered
+    out by the caller's view and dropped by :meth:`remapped`.
+    """
+
+    def __init__(self, fields: Iterable[str] = ()):
+        self.fields: Dict[str, Dict[Any, Set[int]]] = {name: {} for name in fields}
+        self.timeline: List[Tuple[float, int]] = []
+
+    @staticmethod
+    def value_key(value: Any) -> Any:
+        """Hashable stand-in for a metadata value."""
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        return json.dumps(value, sort_keys=True)
+
+    def add(self, slot: int, metadata: Optional[Dict[str, Any]], epoch: float) -> None:
+        if metadata:
+            for name, index in self.fields.items():
+                if name in metadata:
+                    index.setdefault(self.value_key(metadata[name]), set()).add(slot)
+        if not math.isnan(epoch):
+            bisect.insort(self.timeline, (epoch, slot))
+
+    def remapped(self, slots: Dict[int, int]) -> "AttributeIndex":
+        """Return a copy renumbered by ``slots``; slots missing from it are dropped."""
+        index = AttributeIndex()
+        for name, values in self.fields.items():
+            index.fields[name] = {}
+            for value, matches in values.items():
+                kept = {slots[slot] for slot in matches if slot in slots}
+                if kept:
+                    index.fields[name][value] = kept
+        # Renumbering keeps slot order, so the timeline stays sorted.
+        index.timeline = [(epoch, slots[slot]) for epoch, slot in self.timeline if slot in slots]
+        return index
+
+    def time_range(self, since: Optional[float], until: Optional[float]) -> Set[int]:
+        timeline = self.timeline
+        while True:
+            # The timeline only grows, so an unchanged length means no insert
+            # shifted entries between the bisections and the slice.
+            size = len(timeline)
+            lo = 0 if since is None else bisect.bisect_left(timeline, (since, -1))
+            hi = len(timeline) if until is None else bisect.bisect_right(timeline, (until, math.inf))
+            entries = timeline[lo:hi]
+            if len(timeline) == size:
+                return {slot for _, slot in entries}
+
+    def candidates(self, metadata: Dict[str, Any], since: Optional[float] = None,
+                   until: Optional[float] = None) -> Tuple[Optional[Set[int]], Dict[str, Any]]:
+        """Return the slots the indexes allow and the filters they could not apply.
+
+        The slot set is ``None`` when no condition was indexed.
+        """
+        matches: List[Set[int]] = []
+        residual: Dict[str, Any] = {}
+        for name, value in metadata.items():
+            index = self.fields.get(name)
+            if index is None:
+                residual[name] = value
+            else:
+                matches.append(index.get(self.value_key(value), set()))
+        if since is not None or until is not None:
+            matches.append(self.time_range(since, until))
+        if not matches:
+            return None, residual
+        matches.sort(key=len)
+        slots = set(matches[0])
+        for other in matches[1:]:
+            if not slots:
+                break
+            slots &= other
+        return slots, residual
+
+class MemoryView:
+    """A consistent, read-only view of a :class:`JsonMemoryBackend`.
+
+    The writer publishes a new view after every change, and readers work
+    from whichever view was current when they started, without locking.
+    Rows are never changed in place: replacing a memory appends a new slot
+    and ``deleted`` records the version that removed the old one, so a view
+    simply ignores slots at or past ``size`` and slots deleted at or before
+    ``version``. Reclaiming builds new columns and indexes instead of
+    changing these, so an old view stays valid for as long as it is held.
+    """
+
+    __slots__ = ("columns", "key_index", "deleted", "index", "attributes", "version", "size")
+
+    def __init__(self, columns: MemoryColumns, key_index: Dict[str, int], deleted: Dict[int, int],
+                 index: Optional["InvertedIndex"], attributes: Optional["AttributeIndex"], version: int):
+        self.columns = columns
+        self.key_index = key_index
+        self.deleted = deleted
+        self.index = index
+        self.attributes = attributes
+        self.version = version
+        self.size = len(columns)
+
+    def visible(self, slot: int) -> bool:
+        return 0 <= slot < self.size and self.deleted.get(slot, math.inf) > self.version
+
+    def live_slots(self, start: int = 0) -> Iterator[int]:
+        deleted, version = self.deleted, self.version
+        for slot in range(max(start, 0), self.size):
+            if deleted.get(slot, math.inf) > version:
+                yield slot
+
+    def slot(self, key: str) -> Optional[int]:
+        """Slot of the newest record for ``key``."""
+        slot = self.key_index.get(key)
+        if slot is None:
+            slot = self.columns.find(key)
+            if slot is None or slot in self.deleted:
+                return None
+        return slot
+
+class WriteBehindQueue:
+    """Buffers write records and persists them in batches from a background thread.
+
+    A batch is handed to ``flush`` once ``max_pending`` records are waiting or
+    ``interval`` seconds after the first one arrived, whichever comes first.
+    ``submit(..., wait=True)`` blocks until the record has been flushed. If a
+    flush fails the batch is kept and retried, and waiting callers see the error.
+    """
+
+    def __init__(self, flush: Callable[[List[Any]], None], interval: float = 0.05, max_pending: int = 256):
+        self._flush = flush
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: List[Any] = []
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._flushed = 0
+        self._urgent = False
+        self._closed = False
+        self._error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, record: Any, wait: bool = False) -> int:
+        """Queue ``record`` and return its ticket for :meth:`wait`."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            self._pending.append(record)
+            self._submitted += 1
+            ticket = self._submitted
+            if wait or len(self._pending) >= self.max_pending:
+                self._urgent = True
+                self._cond.notify_all()
+            if wait:
+                self._wait_for(ticket)
+            return ticket
+
+    def wait(self, ticket: int) -> None:
+        """Block until the record with ``ticket`` has been flushed."""
+        with self._cond:
+            if self._flushed >= ticket:
+                return
+            self._urgent = True
+            self._cond.notify_all()
+            self._wait_for(ticket)
+
+    def flush(self) -> None:
+        """Persist everything submitted so far and wait for it."""
+        with self._cond:
+            if self._flushed == self._submitted:
+                return
+            self._urgent = True
+            self._cond.notify_all()
+            self._wait_for(self._submitted)
+
+    def close(self) -> None:
+        """Flush what is pending and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _wait_for(self, ticket: int) -> None:
+        while self._flushed < ticket:
+            if self._error is not None:
+                raise self._error
+            self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                deadline = None
+                while not (self._closed or self._urgent):
+                    if not self._pending:
+                        self._cond.wait()
+                        continue
+                    if deadline is None:
+                        deadline = time.monotonic() + self.interval
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, []
+                ticket = self._submitted
+                self._urgent = False
+                if not batch and self._closed:
+                    return
+
+            error = None
+            if batch:
+                try:
+                    self._flush(batch)
+                except Exception as e:
+                    print(f"Error flushing memory writes: {e}")
+                    error = e
+
+            with self._cond:
+                if error is None:
+                    self._flushed = ticket
+                else:
+                    self._pending = batch + self._pending
+                self._error = error
+                self._cond.notify_all()
+            if error is not None:
+                if self._closed:
+                    return
+                time.sleep(self.interval)
+
+class MemoryBackend:
+    """Storage interface behind :class:`MemoryStore`.
+
+    A backend stores complete :class:`Memory` records addressed by key;
+    building the record (timestamp, defaults) is left to the store. In
+    write-behind mode a mutation may return before it is on disk unless
+    ``durable`` is set.
+    """
+
+    def put(self, memory: Memory, durable: bool = False) -> None:
+        """Insert or replace the memory stored under ``memory.key``."""
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[Memory]:
+        raise NotImplementedError
+
+    def delete(self, key: str, durable: bool = False) -> bool:
+        raise NotImplementedError
+
+    def all(self) -> List[Memory]:
+        """Return every memory in insertion order."""
+        raise NotImplementedError
+
+    def list_page(self, limit: int, cursor: Optional[str] = None,
+                  filters: Optional[MemoryFilter] = None) -> Tuple[List[Memory], Optional[str]]:
+        """Return up to ``limit`` memories in insertion order after ``cursor``,
+        plus the cursor for the next page (``None`` on the last page)."""
+        raise NotImplementedError
+
+    def search(self, query: str, limit: Optional[int] = None, offset: int = 0,
+               filters: Optional[MemoryFilter] = None) -> List[Memory]:
+        """Return memories matching any query term and ``filters``, best match first."""
+        raise NotImplementedError
+
+    def iter_search(self, query: str, batch_size: int,
+                    filters: Optional[MemoryFilter] = None) -> Iterator[List[Memory]]:
+        """Yield what :meth:`search` returns in pages of ``batch_size``, ranking only once."""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Wait until every acknowledged mutation is on disk."""
+        pass
+
+    def compact(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+class JsonMemoryBackend(MemoryBackend):
+    """Memories persisted as a JSON snapshot plus an append-only journal.
+
+    In journal mode every mutation is appended to ``<storage_path>.journal``
+    as one compact JSON line, so a write costs the same whatever the size of
+    the store. The ``{"result": {"memories": ...}}`` snapshot is only
+    rewritten by :meth:`compact`, which happens on load (after replaying the
+    journal) or when called explicitly. With ``journal=False`` the snapshot is
+    rewritten on every change, as before.
+
+    With ``write_behind=True`` changes are applied in memory immediately and
+    persisted by a :class:`WriteBehindQueue`, so a burst of adds costs one
+    journal write and fsync (or one snapshot rewrite) per batch.
+
+    With ``snapshot_format="binary"`` the snapshot is written in the
+    memory-mappable layout of :mod:`tools.memory_snapshot` instead of JSON.
+    A binary snapshot is opened in place: records are decoded on access,
+    keys are found by binary search and the search index is built on the
+    first query, so loading does not depend on the size of the store. The
+    format of an existing snapshot is detected when it is loaded.
+
+    Records are held in append-only :class:`MemoryColumns` slots. Replacing
+    a memory appends a new slot (so it moves to the end of the insertion
+    order) and deleting one stamps its slot in ``_deleted``; dead slots are
+    reclaimed once they make up half of the slots. ``_key_index`` maps keys
+    to slots and ``_index`` is an inverted index that backs :meth:`search`.
+
+    ``indexed_fields`` names the metadata fields that get a hash index in
+    ``_attributes`` (see :class:`AttributeIndex`); filters narrow the
+    candidate slots through it before any text is scored. Filters on other
+    fields are checked against each remaining row.
+
+    The backend is safe to share between threads. Mutations go through a
+    single writer lane (``_write_lock``) and each one publishes a new
+    :class:`MemoryView`; reads take the current view and never lock, so a
+    list or search sees every change committed before it started and none
+    made while it runs. ``get`` returns the newest record for a key.
+
+    With ``read_only=True`` nothing on disk is changed: legacy entries get
+    their keys in memory only, the journal is replayed but neither compacted
+    nor truncated, and ``put``, ``delete`` and ``compact`` raise ValueError.
+    Conversions and imports read their source this way.
+    """
+
+    def __init__(self, storage_path: str = "memory.json", journal: bool = True, fsync: bool = True,
+                 write_behind: bool = False, flush_interval: float = 0.05, flush_max_pending: int = 256,
+                 snapshot_format: str = "json", indexed_fields: Iterable[str] = (), read_only: bool = False):
+        if snapshot_format not in ("json", "binary"):
+            raise ValueError(f"Unknown snapshot format: {snapshot_format}")
         self.storage_path = storage_path
-        self.memories: List[Memory] = []
+        self.journal_path = f"{storage_path}.journal"
+        self.journal = journal
+        self.fsync = fsync
+        self.snapshot_format = snapshot_format
+        self.indexed_fields = list(indexed_fields)
+        self.read_only = read_only
+        self._write_lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._reset(MemoryColumns())
+        self._version = 0
+        self._seq = 0
+        self._journal_file = None
+        self._writer: Optional[WriteBehindQueue] = None
         self._load_memories()
+        self._publish()
+        self._maybe_reclaim()
+        if write_behind:
+            self._writer = WriteBehindQueue(self._persist, flush_interval, flush_max_pending)
+
+    def _reset(self, columns: MemoryColumns, index: Optional[InvertedIndex] = None,
+               attributes: Optional[AttributeIndex] = None, indexed: bool = True) -> None:
+        """Start a new generation of columns and indexes; the caller publishes it."""
+        self.columns = columns
+        self._key_index: Dict[str, int] = {}
+        self._deleted: Dict[int, int] = {}
+        if indexed:
+            index = index or InvertedIndex()
+            attributes = attributes or AttributeIndex(self.indexed_fields)
+        self._index: Optional[InvertedIndex] = index
+        self._attributes: Optional[AttributeIndex] = attributes
+
+    def _publish(self) -> None:
+        """Make every change applied so far visible to new readers."""
+        self._version += 1
+        self._view = MemoryView(
+            self.columns, self._key_index, self._deleted, self._index, self._attributes, self._version
+        )
 
     def _load_memories(self) -> None:
-        """Load memories from JSON file if it exists."""
+        """Load memories from the snapshot and replay the journal."""
+        if is_binary_snapshot(self.storage_path):
+            self._load_binary()
+            return
+
+        migrated = 0
         if os.path.exists(self.storage_path):
             try:
                 with open(self.storage_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.memories = [Memory(**memory) for memory in data['result']['memories']]
+                    for entry in data['result']['memories']:
+                        if not entry.get('key'):
+                            entry['key'] = self._legacy_key(entry['content'])
+                            migrated += 1
+                        self._put(entry)
+                    self._seq = (data.get('metadata') or {}).get('journal_seq', 0)
             except Exception as e:
                 print(f"Error loading memories: {e}")
-                self.memories = []
+                self._reset(MemoryColumns())
 
-    def _save_memories(self) -> None:
-        """Save memories to JSON file."""
         try:
-            with open(self.storage_path, 'w', encoding='utf-8') as f:
+            if (self._replay_journal() or migrated) and not self.read_only:
+                self._publish()
+                self.compact()
+        except Exception as e:
+            print(f"Error replaying memory journal: {e}")
+
+    def _load_binary(self) -> None:
+        """Map a binary snapshot and replay the journal on top of it.
+
+        The journal is left in place rather than compacted, so restarting
+        costs O(journal) instead of rewriting the snapshot.
+        """
+        try:
+            snapshot = BinarySnapshot(self.storage_path)
+        except Exception as e:
+            print(f"Error loading memories: {e}")
+            return
+        self._reset(SnapshotColumns(snapshot), indexed=False)
+        self._seq = snapshot.journal_seq
+        try:
+            self._replay_journal()
+        except Exception as e:
+            print(f"Error replaying memory journal: {e}")
+
+    def _replay_journal(self) -> int:
+        """Apply journal records newer than the snapshot. Returns the number applied."""
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        applied = 0
+        valid_bytes = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn write from a crash can only be the last record;
+                    # it was never acknowledged, so drop it.
+                    print(f"Discarding truncated journal record at byte {valid_bytes}")
+                    break
+                valid_bytes += len(line)
+                if record['seq'] <= self._seq:
+                    continue
+                self._apply(record)
+                self._seq = record['seq']
+                applied += 1
+
+        if valid_bytes < os.path.getsize(self.journal_path) and not self.read_only:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(valid_bytes)
+        return applied
+
+    def _legacy_key(self, content: str) -> str:
+        """Derive a stable key for memories saved before keys were stored."""
+        base = hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]
+        key, n = base, 1
+        while key in self._key_index:
+            n += 1
+            key = f"{base}-{n}"
+        return key
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        op = record['op']
+        if op == 'add':
+            self._put(record['memory'])
+        elif op == 'delete':
+            self._remove(record['key'])
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+
+    def _slot(self, key: str) -> Optional[int]:
+        slot = self._key_index.get(key)
+        if slot is None:
+            slot = self.columns.find(key)
+            if slot is None or slot in self._deleted:
+                return None
+        return slot
+
+    def _build_indexes(self, view: MemoryView) -> Tuple[InvertedIndex, AttributeIndex]:
+        """Index every slot in ``view``, including ones deleted after it was taken."""
+        index = InvertedIndex()
+        attributes = AttributeIndex(self.indexed_fields)
+        for slot in range(view.size):
+            _, content, metadata, timestamp = view.columns.row(slot)
+            index.add(slot, content)
+            attributes.add(slot, metadata, timestamp)
+            if slot in view.deleted:
+                index.retire(slot, content)
+        return index, attributes
+
+    def _view_indexes(self, view: MemoryView) -> Tuple[InvertedIndex, AttributeIndex]:
+        """Return the indexes for ``view``, building them on first use after a binary load."""
+        if view.index is not None:
+            return view.index, view.attributes
+        with self._write_lock:
+            if self.columns is not view.columns:
+                # Reclaimed since the view was taken; index it on its own.
+                return self._build_indexes(view)
+            if self._index is None:
+                self._index, self._attributes = self._build_indexes(MemoryView(
+                    self.columns, self._key_index, self._deleted, None, None, self._version
+                ))
+                self._publish()
+            return self._index, self._attributes
+
+    def _put(self, record: Dict[str, Any]) -> None:
+        """Insert or replace a memory given in the snapshot/journal layout."""
+        key = record['key']
+        content = record['content']
+        metadata = record.get('metadata')
+        timestamp = to_epoch(record.get('timestamp', ""))
+        previous = self._slot(key)
+        slot = self.columns.append(key, content, metadata, timestamp)
+        if self._index is not None:
+            self._index.add(slot, content)
+            self._attributes.add(slot, metadata, timestamp)
+        self._key_index[key] = slot
+        if previous is not None:
+            self._retire(previous)
+
+    def _remove(self, key: str) -> bool:
+        slot = self._slot(key)
+        if slot is None:
+            return False
+        self._key_index.pop(key, None)
+        self._retire(slot)
+        return True
+
+    def _retire(self, slot: int) -> None:
+        """Mark ``slot`` deleted as of the next published version."""
+        self._deleted[slot] = self._version + 1
+        if self._index is not None:
+            self._index.retire(slot, self.columns.content(slot))
+
+    def _maybe_reclaim(self) -> None:
+        dead = len(self._deleted)
+        if dead > 1024 and dead * 2 > len(self.columns):
+            self._reclaim()
+
+    def _reclaim(self) -> None:
+        """Copy the live slots into new columns and indexes, dropping dead ones.
+
+        Readers holding an older view keep the old structures, which are
+        no longer touched.
+        """
+        view = self._view
+        columns, slots = view.columns.pack(view.live_slots())
+        index = None if view.index is None else view.index.remapped(slots)
+        attributes = None if view.attributes is None else view.attributes.remapped(slots)
+        self._reset(columns, index, attributes, indexed=index is not None)
+        self._key_index.update((key, slot) for slot, key in enumerate(columns.keys))
+        self._publish()
+
+    def _append_journal(self, records: List[Dict[str, Any]]) -> None:
+        """Durably append records to the journal with a single write."""
+        lines = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n" for record in records
+        )
+        with self._io_lock:
+            if self._journal_file is None:
+                self._journal_file = open(self.journal_path, 'ab')
+            self._journal_file.write(lines.encode('utf-8'))
+            self._journal_file.flush()
+            if self.fsync:
+                os.fsync(self._journal_file.fileno())
+
+    def _persist(self, records: List[Dict[str, Any]]) -> None:
+        if self.journal:
+            self._append_journal(records)
+        else:
+            with self._write_lock:
+                self._save_memories()
+
+    def _commit(self, record: Dict[str, Any]) -> Optional[int]:
+        """Publish and persist a mutation that has already been applied in memory.
+
+        Called with the write lock held. In write-behind mode the record is
+        queued and its ticket returned so the caller can wait for it once
+        the lock is released.
+        """
+        self._publish()
+        self._seq += 1
+        record = {"seq": self._seq, **record}
+        if self._writer is not None:
+            return self._writer.submit(record)
+        self._persist([record])
+        return None
+
+    def _wait(self, ticket: Optional[int], durable: bool) -> None:
+        if durable and ticket is not None and self._writer is not None:
+            self._writer.wait(ticket)
+
+    def export(self, path: str, snapshot_format: Optional[str] = None) -> int:
+        """Atomically write every live memory to ``path``. Returns the number written."""
+        snapshot_format = snapshot_format or self.snapshot_format
+        with self._write_lock:
+            view, seq = self._view, self._seq
+        tmp_path = f"{path}.tmp"
+        columns = view.columns
+        slots = list(view.live_slots())
+        if snapshot_format == "binary":
+            write_snapshot(tmp_path, (columns.row(slot) for slot in slots), seq, self.fsync)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump({
                     "result": {
-                        "memories": [memory.dict() for memory in self.memories]
+                        "memories": [columns.record(slot) for slot in slots]
                     },
                     "context": None,
-                    "metadata": {}
+                    "metadata": {"journal_seq": seq}
                 }, f, indent=2, ensure_ascii=False)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        if (os.name == "nt" and isinstance(columns, SnapshotColumns)
+                and os.path.abspath(path) == os.path.abspath(self.storage_path)):
+            # Windows cannot replace a mapped file. Elsewhere the old mapping
+            # stays readable for views that still hold it.
+            columns.close()
+        os.replace(tmp_path, path)
+        return len(slots)
+
+    def _save_memories(self) -> None:
+        """Atomically rewrite the snapshot file. Called with the write lock held."""
+        try:
+            if self.snapshot_format == "binary":
+                view = self._view
+                slots = {old: new for new, old in enumerate(view.live_slots())}
+                self.export(self.storage_path)
+                index = None if view.index is None else view.index.remapped(slots)
+                attributes = None if view.attributes is None else view.attributes.remapped(slots)
+                self._reset(SnapshotColumns(BinarySnapshot(self.storage_path)), index, attributes,
+                            indexed=index is not None)
+                self._publish()
+            else:
+                if isinstance(self.columns, SnapshotColumns):
+                    self._reclaim()
+                self.export(self.storage_path)
         except Exception as e:
             print(f"Error saving memories: {e}")
+            raise
+
+    def compact(self) -> None:
+        """Fold the journal into a fresh snapshot and truncate it.
+
+        The snapshot records the last journal sequence number it contains,
+        so a crash between the two steps only leaves records that replay
+        will skip.
+        """
+        self._check_writable()
+        self.flush()
+        with self._write_lock:
+            self._save_memories()
+            with self._io_lock:
+                if self._journal_file is not None:
+                    self._journal_file.close()
+                    self._journal_file = None
+                if os.path.exists(self.journal_path):
+                    open(self.journal_path, 'wb').close()
+
+    def flush(self) -> None:
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self) -> None:
+        """Flush pending writes, compact the journal and release the file handle."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.journal and not self.read_only:
+            self.compact()
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise ValueError(f"Memory store {self.storage_path} is opened read-only")
 
-    def add(self, key: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
-        memory = Memory(
+    def put(self, memory: Memory, durable: bool = False) -> None:
+        self._check_writable()
+        record = memory.dict()
+        with self._write_lock:
+            self._put(record)
+            ticket = self._commit({"op": "add", "memory": record})
+            self._maybe_reclaim()
+        self._wait(ticket, durable)
+
+    def get(self, key: str) -> Optional[Memory]:
+        view = self._view
+        slot = view.slot(key)
+        return None if slot is None else view.columns.memory(slot)
+
+    def delete(self, key: str, durable: bool = False) -> bool:
+        self._check_writable()
+        with self._write_lock:
+            if not self._remove(key):
+                return False
+            ticket = self._commit({"op": "delete", "key": key})
+            self._maybe_reclaim()
+        self._wait(ticket, durable)
+        return True
+
+    def all(self) -> List[Memory]:
+        view = self._view
+        return [view.columns.memory(slot) for slot in view.live_slots()]
+
+    def _filtered_slots(self, view: MemoryView, filters: MemoryFilter) -> List[int]:
+        """Slots of ``view`` matching ``filters``, in ascending order."""
+        since = None if filters.since is None else to_epoch(filters.since)
+        until = None if filters.until is None else to_epoch(filters.until)
+        _, attributes = self._view_indexes(view)
+        candidates, residual = attributes.candidates(filters.metadata, since, until)
+        if candidates is None:
+            slots = view.live_slots()
+        else:
+            slots = [slot for slot in sorted(candidates) if view.visible(slot)]
+        if not residual:
+            return list(slots)
+        matches = []
+        for slot in slots:
+            metadata = view.columns.row(slot)[2] or {}
+            if all(name in metadata and metadata[name] == value for name, value in residual.items()):
+                matches.append(slot)
+        return matches
+
+    def list_page(self, limit: int, cursor: Optional[str] = None,
+                  filters: Optional[MemoryFilter] = None) -> Tuple[List[Memory], Optional[str]]:
+        view = self._view
+        start = 0
+        if cursor:
+            state = decode_cursor(cursor)
+            # The slot is only a hint: reclaiming renumbers slots, so fall
+            # back to the key's current position when they disagree.
+            slot = state.get("slot", -1)
+            if view.columns.key(slot) != state.get("key"):
+                current = view.slot(state.get("key", ""))
+                slot = slot if current is None or current >= view.size else current
+            start = slot + 1
+
+        if filters is None:
+            slots = view.live_slots(start)
+        else:
+            slots = self._filtered_slots(view, filters)
+            slots = slots[bisect.bisect_left(slots, start):]
+
+        page: List[Memory] = []
+        last_slot = start - 1
+        for slot in slots:
+            if len(page) == limit:
+                return page, encode_cursor({"key": page[-1].key, "slot": last_slot})
+            page.append(view.columns.memory(slot))
+            last_slot = slot
+        return page, None
+
+    def search(self, query: str, limit: Optional[int] = None, offset: int = 0,
+               filters: Optional[MemoryFilter] = None) -> List[Memory]:
+        """Return memories matching any query term, ranked by BM25."""
+        view = self._view
+        allowed = None if filters is None else set(self._filtered_slots(view, filters))
+        if allowed is not None and not allowed:
+            return []
+        index, _ = self._view_indexes(view)
+        ranked = index.search(query, limit, offset, allowed, view.visible)
+        return [view.columns.memory(slot) for slot, _ in ranked]
+
+    def iter_search(self, query: str, batch_size: int,
+                    filters: Optional[MemoryFilter] = None) -> Iterator[List[Memory]]:
+        """Rank every match once, keeping only slots, then build the memories page by page.
+
+        All pages come from the view current when iteration starts.
+        """
+        view = self._view
+        allowed = None if filters is None else set(self._filtered_slots(view, filters))
+        if allowed is not None and not allowed:
+            return
+        index, _ = self._view_indexes(view)
+        ranked = index.search(query, None, 0, allowed, view.visible)
+        for start in range(0, len(ranked), batch_size):
+            yield [view.columns.memory(slot) for slot, _ in ranked[start:start + batch_size]]
+
+class MemoryStore:
+    """Front end for memory storage.
+
+    ``backend`` selects where memories live: ``"json"`` (the default, see
+    :class:`JsonMemoryBackend`) or ``"sqlite"`` (see
+    :class:`tools.memory_sqlite.SQLiteMemoryBackend`). When not given it is
+    read from the ``MEMORY_BACKEND`` environment variable. For SQLite a
+    ``.json`` storage path is swapped for the matching ``.db`` file.
+
+    Write-behind batching is enabled with ``write_behind=True`` or
+    ``MEMORY_WRITE_BEHIND=1``; ``MEMORY_FLUSH_INTERVAL`` (seconds) and
+    ``MEMORY_FLUSH_MAX_PENDING`` tune when a batch is flushed.
+
+    ``snapshot_format="binary"`` (or ``MEMORY_SNAPSHOT_FORMAT=binary``) keeps
+    the JSON backend's snapshot in a ``.snap`` file next to the ``.json`` one.
+    If only the JSON file exists it is converted once; it is left untouched.
+
+    ``indexed_fields`` (or the comma-separated ``MEMORY_INDEXED_FIELDS``)
+    lists the metadata fields that filters are expected to use often; both
+    backends keep an index on each of them.
+
+    A store can be shared between threads: both backends serialize writes
+    and serve each read from a consistent snapshot.
+    """
+
+    def __init__(self, storage_path: str = "memory.json", backend: Optional[str] = None, **options: Any):
+        backend = backend or os.getenv("MEMORY_BACKEND", "json")
+        if os.getenv("MEMORY_WRITE_BEHIND", "").lower() in ("1", "true", "yes"):
+            options.setdefault("write_behind", True)
+        if os.getenv("MEMORY_FLUSH_INTERVAL"):
+            options.setdefault("flush_interval", float(os.getenv("MEMORY_FLUSH_INTERVAL")))
+        if os.getenv("MEMORY_FLUSH_MAX_PENDING"):
+            options.setdefault("flush_max_pending", int(os.getenv("MEMORY_FLUSH_MAX_PENDING")))
+        if os.getenv("MEMORY_INDEXED_FIELDS"):
+            fields = [name.strip() for name in os.getenv("MEMORY_INDEXED_FIELDS").split(",")]
+            options.setdefault("indexed_fields", [name for name in fields if name])
+        if backend == "json":
+            options.setdefault("snapshot_format", os.getenv("MEMORY_SNAPSHOT_FORMAT", "json"))
+            if options["snapshot_format"] == "binary" and storage_path.endswith(".json"):
+                json_path, storage_path = storage_path, storage_path[:-len(".json")] + ".snap"
+                if not os.path.exists(storage_path) and os.path.exists(json_path):
+                    count = JsonMemoryBackend(json_path, read_only=True).export(storage_path, "binary")
+                    print(f"Converted {count} memories from {json_path} to {storage_path}")
+            self.backend: MemoryBackend = JsonMemoryBackend(storage_path, **options)
+        elif backend == "sqlite":
+            from .memory_sqlite import SQLiteMemoryBackend
+            if storage_path.endswith(".json"):
+                storage_path = storage_path[:-len(".json")] + ".db"
+            self.backend = SQLiteMemoryBackend(storage_path, **options)
+        else:
+            raise ValueError(f"Unknown memory backend: {backend}")
+        self.storage_path = storage_path
+
+    def add(self, key: str, content: str, metadata: Optional[Dict[str, Any]] = None, durable: bool = False) -> None:
+        """Store a memory under ``key``, replacing any existing one.
+
+        In write-behind mode ``durable=True`` waits until the write is on disk.
+        """
+        self.backend.put(Memory(
+            key=key,
             content=content,
             metadata=metadata or {},
             timestamp=datetime.utcnow().isoformat()
-        )
-        self.memories.append(memory)
-        self._save_memories()
+        ), durable)
+
+    def get(self, key: str) -> Optional[Memory]:
+        return self.backend.get(key)
+
+    def delete(self, key: str, durable: bool = False) -> bool:
+        return self.backend.delete(key, durable)
 
     def get_all(self) -> List[Memory]:
-        return self.memories
+        return self.backend.all()
 
-    def search(self, query: str) -> List[Memory]:
-        # Simple search implementation - can be enhanced later
-        query = query.lower()
-        return [memory for memory in self.memories if query in memory.content.lower()]
+    def list_all(self) -> List[Memory]:
+        return self.get_all()
+
+    def search(self, query: str, limit: Optional[int] = None, offset: int = 0,
+               filters: Optional[MemoryFilter] = None) -> List[Memory]:
+        return self.backend.search(query, limit, offset, filters)
+
+    def list_page(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                  filters: Optional[MemoryFilter] = None) -> Tuple[List[Memory], Optional[str]]:
+        """Return one page of memories in insertion order and the next cursor."""
+        return self.backend.list_page(page_size(limit), cursor, filters)
+
+    def search_page(self, query: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                    offset: int = 0, filters: Optional[MemoryFilter] = None) -> Tuple[List[Memory], Optional[str]]:
+        """Return one page of ranked search results and the next cursor.
+
+        Ranking is recomputed per page, so the cursor only carries the offset
+        into the ranked list; ``offset`` is used when no cursor is given.
+        """
+        limit = page_size(limit)
+        if cursor:
+            offset = int(decode_cursor(cursor).get("offset", 0))
+        results = self.backend.search(query, limit + 1, offset, filters)
+        next_cursor = encode_cursor({"offset": offset + limit}) if len(results) > limit else None
+        return results[:limit], next_cursor
+
+    def iter_all(self, batch_size: int = 500, filters: Optional[MemoryFilter] = None) -> Iterator[List[Memory]]:
+        """Yield every memory in pages of ``batch_size``, reading one page at a time."""
+        cursor = None
+        while True:
+            page, cursor = self.list_page(batch_size, cursor, filters)
+            if page:
+                yield page
+            if cursor is None:
+                return
+
+    def iter_search(self, query: str, batch_size: int = 500,
+                    filters: Optional[MemoryFilter] = None) -> Iterator[List[Memory]]:
+        """Yield ranked search results in pages of ``batch_size``.
+
+        The query is ranked once for the whole iteration; only the pages
+        are materialized as they are read.
+        """
+        return self.backend.iter_search(query, page_size(batch_size), filters)
+
+    def flush(self) -> None:
+        self.backend.flush()
+
+    def compact(self) -> None:
+        self.backend.compact()
+
+    def close(self) -> None:
+        self.backend.close()
 
 class MemoryTool(BaseTool):
     def __init__(self, storage_path: str = None):
@@ -84,7 +1240,7 @@ class MemoryTool(BaseTool):
                 },
                 "key": {
                     "type": "string",
-                    "description": "Key for the memory"
+                    "description": "Key for the memory; adding an existing key replaces it"
                 },
                 "content": {
                     "type": "string",
@@ -94,13 +1250,47 @@ class MemoryTool(BaseTool):
                     "type": "string",
                     "description": "Search query"
                 },
+                "limit": {
+                    "type": "integer",
+                    "description": f"Page size for search and list (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})"
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "next_cursor from a previous search or list call"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Number of ranked search results to skip when no cursor is given",
+                    "default": 0
+                },
                 "metadata": {
                     "type": "object",
                     "description": "Optional metadata"
+                },
+                "filters": {
+                    "type": "object",
+                    "description": "Metadata fields and values that search and list results must match"
+                },
+                "since": {
+                    "type": "string",
+                    "description": "Only search or list memories stored at or after this ISO timestamp"
+                },
+                "until": {
+                    "type": "string",
+                    "description": "Only search or list memories stored at or before this ISO timestamp"
+                },
+                "durable": {
+                    "type": "boolean",
+                    "description": "Wait until an add or delete is written to disk",
+                    "default": False
                 }
             }
         )
 
+    @staticmethod
+    def _filters(parameters: Dict[str, Any]) -> Optional[MemoryFilter]:
+        return MemoryFilter.build(parameters.get("filters"), parameters.get("since"), parameters.get("until"))
+
     def execute(self, parameters: Dict[str, Any]) -> ToolResponse:
         """Execute the Memory tool with given parameters."""
         try:
@@ -115,7 +1305,7 @@ class MemoryTool(BaseTool):
                     return ToolResponse(error="Key and content are required for add action")
                 
                 metadata = parameters.get("metadata", {})
-                self.store.add(key, content, metadata)
+                self.store.add(key, content, metadata, durable=parameters.get("durable", False))
                 return ToolResponse(result={"message": "Memory added successfully"})
 
             elif action == "get":
@@ -123,38 +1313,41 @@ class MemoryTool(BaseTool):
                 if not key:
                     return ToolResponse(error="Key is required for get action")
                 
-                memories = self.store.get_all()
-                for memory in memories:
-                    if memory.content == key:
-                        return ToolResponse(result=memory)
-                
-                return ToolResponse(error=f"Memory with key '{key}' not found")
+                memory = self.store.get(key)
+                if memory is None:
+                    return ToolResponse(error=f"Memory with key '{key}' not found")
+                return ToolResponse(result=memory)
 
             elif action == "search":
                 query = parameters.get("query")
                 if not query:
                     return ToolResponse(error="Query is required for search action")
                 
-                results = self.store.search(query)
-                return ToolResponse(result={"results": results})
+                results, next_cursor = self.store.search_page(
+                    query,
+                    limit=parameters.get("limit"),
+                    cursor=parameters.get("cursor"),
+                    offset=parameters.get("offset", 0),
+                    filters=self._filters(parameters)
+                )
+                return ToolResponse(result={"results": results, "next_cursor": next_cursor})
 
             elif action == "delete":
                 key = parameters.get("key")
                 if not key:
                     return ToolResponse(error="Key is required for delete action")
                 
-                memories = self.store.get_all()
-                for i, memory in enumerate(memories):
-                    if memory.content == key:
-                        del memories[i]
-                        self.store._save_memories()
-                        return ToolResponse(result={"message": "Memory deleted successfully"})
-                
-                return ToolResponse(error=f"Memory with key '{key}' not found")
+                if not self.store.delete(key, durable=parameters.get("durable", False)):
+                    return ToolResponse(error=f"Memory with key '{key}' not found")
+                return ToolResponse(result={"message": "Memory deleted successfully"})
 
             elif action == "list":
-                memories = self.store.get_all()
-                return ToolResponse(result={"memories": memories})
+                memories, next_cursor = self.store.list_page(
+                    limit=parameters.get("limit"),
+                    cursor=parameters.get("cursor"),
+                    filters=self._filters(parameters)
+                )
+                return ToolResponse(result={"memories": memories, "next_cursor": next_cursor})
 
             else:
                 return ToolResponse(error=f"Unknown action: {action}")
@@ -0,0 +1,155 @@
+"""Binary snapshot format for the JSON memory backend.
+
+A snapshot is a single file that can be memory-mapped and read in place:
+
+    header    magic, record count, journal sequence, table positions
+    records   per record: timestamp (f64), key/content/metadata lengths
+              (u32 each), then the UTF-8 key, content and JSON metadata
+    offsets   u64 file offset of every record, in insertion order
+    key order u32 record numbers sorted by key, for binary search
+
+Opening a snapshot only reads the header, so it costs the same whatever
+the number of records; fields are decoded when a record is accessed.
+
+Convert to and from the JSON layout with:
+
+    python -m tools.memory_snapshot to-binary memory.json memory.snap
+    python -m tools.memory_snapshot to-json memory.snap memory.json
+"""
+from typing import Any, Dict, Iterable, Optional, Tuple
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"MEMSNAP1"
+HEADER = struct.Struct("<8sQQQQ")
+RECORD = struct.Struct("<dIII")
+OFFSET = struct.Struct("<Q")
+KEY_ORDER = struct.Struct("<I")
+
+Row = Tuple[str, str, Optional[Dict[str, Any]], float]
+
+def is_binary_snapshot(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def write_snapshot(path: str, rows: Iterable[Row], journal_seq: int = 0, fsync: bool = True) -> int:
+    """Write ``(key, content, metadata, epoch)`` rows to ``path``. Returns the row count."""
+    offsets = []
+    keys = []
+    with open(path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        position = HEADER.size
+        for key, content, metadata, timestamp in rows:
+            key_bytes = key.encode("utf-8")
+            content_bytes = content.encode("utf-8")
+            metadata_bytes = json.dumps(metadata, ensure_ascii=False).encode("utf-8") if metadata else b""
+            offsets.append(position)
+            keys.append(key)
+            f.write(RECORD.pack(timestamp, len(key_bytes), len(content_bytes), len(metadata_bytes)))
+            f.write(key_bytes)
+            f.write(content_bytes)
+            f.write(metadata_bytes)
+            position += RECORD.size + len(key_bytes) + len(content_bytes) + len(metadata_bytes)
+
+        offsets_pos = position
+        f.write(b"".join(OFFSET.pack(offset) for offset in offsets))
+        key_order_pos = offsets_pos + OFFSET.size * len(offsets)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        f.write(b"".join(KEY_ORDER.pack(i) for i in order))
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(offsets), journal_seq, offsets_pos, key_order_pos))
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+    return len(offsets)
+
+class BinarySnapshot:
+    """Read-only, memory-mapped view of a snapshot written by :func:`write_snapshot`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.journal_seq, self._offsets_pos, self._key_order_pos = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a binary memory snapshot")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def _header(self, i: int) -> Tuple[int, float, int, int, int]:
+        offset = OFFSET.unpack_from(self._mmap, self._offsets_pos + OFFSET.size * i)[0]
+        timestamp, key_len, content_len, metadata_len = RECORD.unpack_from(self._mmap, offset)
+        return offset + RECORD.size, timestamp, key_len, content_len, metadata_len
+
+    def key(self, i: int) -> str:
+        start, _, key_len, _, _ = self._header(i)
+        return self._mmap[start:start + key_len].decode("utf-8")
+
+    def content(self, i: int) -> str:
+        start, _, key_len, content_len, _ = self._header(i)
+        start += key_len
+        return self._mmap[start:start + content_len].decode("utf-8")
+
+    def metadata(self, i: int) -> Optional[Dict[str, Any]]:
+        start, _, key_len, content_len, metadata_len = self._header(i)
+        if not metadata_len:
+            return None
+        start += key_len + content_len
+        return json.loads(self._mmap[start:start + metadata_len])
+
+    def timestamp(self, i: int) -> float:
+        return self._header(i)[1]
+
+    def row(self, i: int) -> Row:
+        start, timestamp, key_len, content_len, metadata_len = self._header(i)
+        data = self._mmap[start:start + key_len + content_len + metadata_len]
+        metadata = json.loads(data[key_len + content_len:]) if metadata_len else None
+        return (
+            data[:key_len].decode("utf-8"),
+            data[key_len:key_len + content_len].decode("utf-8"),
+            metadata,
+            timestamp,
+        )
+
+    def find(self, key: str) -> Optional[int]:
+        """Binary-search the key order table. Returns the record number or ``None``."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i = KEY_ORDER.unpack_from(self._mmap, self._key_order_pos + KEY_ORDER.size * mid)[0]
+            probe = self.key(i)
+            if probe == key:
+                return i
+            if probe < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+def main(argv) -> int:
+    from .memory import JsonMemoryBackend
+
+    if len(argv) != 4 or argv[1] not in ("to-binary", "to-json"):
+        print("Usage: python -m tools.memory_snapshot to-binary|to-json <source> <destination>")
+        return 1
+    _, command, source, destination = argv
+    backend = JsonMemoryBackend(source, read_only=True)
+    count = backend.export(destination, "binary" if command == "to-binary" else "json")
+    print(f"Wrote {count} memories to {destination}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
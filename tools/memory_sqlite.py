@@ -0,0 +1,294 @@
+"""SQLite storage backend for the memory tool."""
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+import json
+import re
+import sqlite3
+import sys
+import threading
+from .memory import (
+    InvertedIndex, JsonMemoryBackend, Memory, MemoryBackend, MemoryFilter, WriteBehindQueue, decode_cursor,
+    encode_cursor, to_epoch, to_iso
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    timestamp TEXT NOT NULL DEFAULT ''
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_memories_key ON memories(key);
+CREATE INDEX IF NOT EXISTS idx_memories_timestamp ON memories(timestamp);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+    content, content='memories', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE OF content ON memories BEGIN
+    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+INSERT = "INSERT INTO memories (id, key, content, metadata, timestamp) VALUES (?, ?, ?, ?, ?)"
+
+COLUMNS = "m.key, m.content, m.metadata, m.timestamp"
+
+FIELD_RE = re.compile(r"^\w+$")
+
+def field_expression(name: str) -> str:
+    """SQL expression for a metadata field; the same text is used by its index."""
+    if not FIELD_RE.match(name):
+        raise ValueError(f"Invalid metadata field name: {name}")
+    return f"json_extract(metadata, '$.{name}')"
+
+def sql_value(value: Any) -> Any:
+    """Convert a filter value to what ``json_extract`` returns for it."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    return value
+
+def filter_clause(filters: Optional[MemoryFilter]) -> Tuple[str, List[Any]]:
+    """Build an ``AND ...`` clause (possibly empty) and its parameters."""
+    if filters is None:
+        return "", []
+    clauses: List[str] = []
+    params: List[Any] = []
+    for name, value in filters.metadata.items():
+        clauses.append(f"{field_expression(name)} IS ?")
+        params.append(sql_value(value))
+    if filters.since is not None or filters.until is not None:
+        clauses.append("timestamp != ''")
+    if filters.since is not None:
+        clauses.append("timestamp >= ?")
+        params.append(to_iso(to_epoch(filters.since)))
+    if filters.until is not None:
+        clauses.append("timestamp <= ?")
+        params.append(to_iso(to_epoch(filters.until)))
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+class SQLiteMemoryBackend(MemoryBackend):
+    """Memories stored in SQLite, with an FTS5 table backing search.
+
+    The database runs in WAL mode so readers never block the writer, and
+    each thread gets its own connection. Nothing is loaded into memory up
+    front, so startup does not depend on the size of the store.
+
+    With ``write_behind=True`` upserts are queued and committed in batches,
+    one transaction per batch. Reads flush the queue first so they always
+    see earlier writes.
+
+    Each of ``indexed_fields`` gets an expression index on its
+    ``json_extract`` value; timestamps are indexed as stored.
+
+    Writes from every thread go through one writer lane (``_write_lock``),
+    so they never contend for SQLite's write lock. Each read is a single
+    statement, which WAL runs against a consistent snapshot of the database.
+
+    Replacing a memory deletes its row and inserts a new one after every
+    other, so, as in the JSON backend, it moves to the end of the insertion
+    order and a list cursor taken before the replace sees it again.
+    """
+
+    def __init__(self, storage_path: str = "memory.db", synchronous: str = "NORMAL",
+                 write_behind: bool = False, flush_interval: float = 0.05, flush_max_pending: int = 256,
+                 indexed_fields: Iterable[str] = ()):
+        self.storage_path = storage_path
+        self.synchronous = synchronous
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            for name in indexed_fields:
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_memories_meta_{name} ON memories({field_expression(name)})"
+                )
+        self._writer = WriteBehindQueue(self._persist, flush_interval, flush_max_pending) if write_behind else None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.storage_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _row_to_memory(row: tuple) -> Memory:
+        key, content, metadata, timestamp = row
+        return Memory(key=key, content=content, metadata=json.loads(metadata), timestamp=timestamp)
+
+    @staticmethod
+    def _memory_to_row(memory: Memory) -> tuple:
+        return (memory.key, memory.content, json.dumps(memory.metadata, ensure_ascii=False), memory.timestamp)
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, rows: Iterable[tuple]) -> None:
+        """Delete and re-insert each row. Called in a transaction on the writer lane."""
+        # Ids are taken before deleting, so replacing the newest row still gets a later id.
+        next_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM memories").fetchone()[0]
+        for row in rows:
+            next_id += 1
+            conn.execute("DELETE FROM memories WHERE key = ?", (row[0],))
+            conn.execute(INSERT, (next_id, *row))
+
+    def _persist(self, rows: List[tuple]) -> None:
+        with self._write_lock, self._connection() as conn:
+            self._upsert(conn, rows)
+
+    def put(self, memory: Memory, durable: bool = False) -> None:
+        if self._writer is not None:
+            self._writer.submit(self._memory_to_row(memory), wait=durable)
+            return
+        with self._write_lock, self._connection() as conn:
+            self._upsert(conn, [self._memory_to_row(memory)])
+
+    def put_many(self, memories: List[Memory]) -> None:
+        """Upsert a batch of memories in a single transaction."""
+        with self._write_lock, self._connection() as conn:
+            self._upsert(conn, (self._memory_to_row(memory) for memory in memories))
+
+    def get(self, key: str) -> Optional[Memory]:
+        self.flush()
+        row = self._connection().execute(
+            f"SELECT {COLUMNS} FROM memories m WHERE m.key = ?", (key,)
+        ).fetchone()
+        return None if row is None else self._row_to_memory(row)
+
+    def delete(self, key: str, durable: bool = False) -> bool:
+        # The result depends on what is stored, so deletes are never deferred.
+        self.flush()
+        with self._write_lock, self._connection() as conn:
+            cursor = conn.execute("DELETE FROM memories WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def all(self) -> List[Memory]:
+        self.flush()
+        rows = self._connection().execute(f"SELECT {COLUMNS} FROM memories m ORDER BY m.id")
+        return [self._row_to_memory(row) for row in rows]
+
+    def list_page(self, limit: int, cursor: Optional[str] = None,
+                  filters: Optional[MemoryFilter] = None) -> Tuple[List[Memory], Optional[str]]:
+        self.flush()
+        after = int(decode_cursor(cursor).get("id", 0)) if cursor else 0
+        clause, params = filter_clause(filters)
+        rows = self._connection().execute(
+            f"SELECT m.id, {COLUMNS} FROM memories m WHERE m.id > ?{clause} ORDER BY m.id LIMIT ?",
+            (after, *params, limit + 1)
+        ).fetchall()
+        page = [self._row_to_memory(row[1:]) for row in rows[:limit]]
+        next_cursor = encode_cursor({"id": rows[limit - 1][0]}) if len(rows) > limit else None
+        return page, next_cursor
+
+    def _ranked(self, columns: str, query: str,
+                filters: Optional[MemoryFilter]) -> Optional[Tuple[str, Tuple[Any, ...]]]:
+        """SQL selecting ``columns`` of the rows matching ``query``, best first; None if nothing can match."""
+        # Quote each token so user input is never parsed as FTS5 syntax, and
+        # OR them together to match the JSON backend's any-term semantics.
+        tokens = InvertedIndex.tokenize(query)
+        if not tokens:
+            return None
+        match = " OR ".join(f'"{token}"' for token in dict.fromkeys(tokens))
+        clause, params = filter_clause(filters)
+        if clause:
+            # Narrow by the secondary indexes first and only score the rows left.
+            return (
+                f"SELECT {columns} FROM memories m JOIN memories_fts ON memories_fts.rowid = m.id "
+                f"WHERE m.id IN (SELECT id FROM memories WHERE 1{clause}) AND memories_fts MATCH ? "
+                "ORDER BY bm25(memories_fts), m.id",
+                (*params, match)
+            )
+        return (
+            f"SELECT {columns} FROM memories_fts JOIN memories m ON m.id = memories_fts.rowid "
+            "WHERE memories_fts MATCH ? ORDER BY bm25(memories_fts), m.id",
+            (match,)
+        )
+
+    def search(self, query: str, limit: Optional[int] = None, offset: int = 0,
+               filters: Optional[MemoryFilter] = None) -> List[Memory]:
+        ranked = self._ranked(COLUMNS, query, filters)
+        if ranked is None:
+            return []
+        self.flush()
+        sql, args = ranked
+        rows = self._connection().execute(f"{sql} LIMIT ? OFFSET ?", (*args, -1 if limit is None else limit, offset))
+        return [self._row_to_memory(row) for row in rows]
+
+    def iter_search(self, query: str, batch_size: int,
+                    filters: Optional[MemoryFilter] = None) -> Iterator[List[Memory]]:
+        """Rank every match once, keeping only row ids, then read the rows page by page.
+
+        Pages are read by id rather than from one open cursor because the
+        caller may resume the iterator on another thread (and connection).
+        Rows deleted meanwhile are skipped.
+        """
+        ranked = self._ranked("m.id", query, filters)
+        if ranked is None:
+            return
+        self.flush()
+        sql, args = ranked
+        ids = [row[0] for row in self._connection().execute(sql, args)]
+        for start in range(0, len(ids), batch_size):
+            page = ids[start:start + batch_size]
+            rows = {row[0]: row[1:] for row in self._connection().execute(
+                f"SELECT m.id, {COLUMNS} FROM memories m WHERE m.id IN (SELECT value FROM json_each(?))",
+                (json.dumps(page),)
+            )}
+            memories = [self._row_to_memory(rows[row_id]) for row_id in page if row_id in rows]
+            if memories:
+                yield memories
+
+    def flush(self) -> None:
+        if self._writer is not None:
+            self._writer.flush()
+
+    def compact(self) -> None:
+        self.flush()
+        conn = self._connection()
+        conn.execute("INSERT INTO memories_fts(memories_fts) VALUES ('optimize')")
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+def import_json(json_path: str, db_path: str) -> int:
+    """Copy every memory from a JSON store (snapshot and journal) into SQLite.
+
+    Existing keys in the database are overwritten. Returns the number of
+    memories imported.
+    """
+    memories = JsonMemoryBackend(json_path, read_only=True).all()
+    backend = SQLiteMemoryBackend(db_path)
+    try:
+        backend.put_many(memories)
+    finally:
+        backend.close()
+    return len(memories)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m tools.memory_sqlite <memory.json> <memory.db>")
+        sys.exit(1)
+    count = import_json(sys.argv[1], sys.argv[2])
+    print(f"Imported {count} memories into {sys.argv[2]}")
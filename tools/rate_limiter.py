@@ -0,0 +1,249 @@
+"""Rate limiting for Brave Search API calls."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import sqlite3
+import time
+
+DEFAULT_QUOTA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "brave_quota.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quota (
+    name TEXT PRIMARY KEY,
+    next_slot REAL NOT NULL DEFAULT 0,
+    month TEXT NOT NULL DEFAULT '',
+    used INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+class Priority(IntEnum):
+    """Scheduling order for queued requests; lower goes first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+    @classmethod
+    def parse(cls, value: Any) -> "Priority":
+        if isinstance(value, int):
+            return cls(value)
+        try:
+            return cls[str(value).upper()]
+        except KeyError:
+            raise ValueError(f"priority must be one of: {', '.join(p.name.lower() for p in cls)}")
+
+class RateLimitExceeded(Exception):
+    def __init__(self, message: str, status_code: int = 429):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(self.message)
+
+def current_month(now: float) -> str:
+    return time.strftime("%Y-%m", time.gmtime(now))
+
+def month_end(month: str) -> str:
+    year, number = map(int, month.split("-"))
+    year, number = (year + 1, 1) if number == 12 else (year, number + 1)
+    return datetime(year, number, 1, tzinfo=timezone.utc).isoformat()
+
+class QuotaStore:
+    """Brave request quota kept in one SQLite file shared by every process.
+
+    A row per limiter holds the next free request slot (wall-clock seconds)
+    and the number of requests made in the current UTC calendar month. Each
+    request reserves a slot in an ``IMMEDIATE`` transaction, so uvicorn
+    workers and restarts all draw from the same per-second schedule and
+    monthly total. The month counter starts over whenever the stored month
+    differs from the current one.
+    """
+
+    def __init__(self, path: str, name: str = "brave"):
+        self.path = path
+        self.name = name
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute("INSERT OR IGNORE INTO quota (name) VALUES (?)", (name,))
+
+    def reserve(self, interval: float, burst: int, per_month: int, max_wait: float) -> Tuple[float, float]:
+        """Take the next request slot.
+
+        Returns ``(wait, slot)``: seconds until the request may be sent, and
+        the reservation to hand to :meth:`release` if it is abandoned.
+        Raises :class:`RateLimitExceeded` when the month's quota is spent or
+        the slot is more than ``max_wait`` seconds away.
+        """
+        now = time.time()
+        month = current_month(now)
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            next_slot, stored_month, used = self._conn.execute(
+                "SELECT next_slot, month, used FROM quota WHERE name = ?", (self.name,)
+            ).fetchone()
+            if stored_month != month:
+                used = 0
+            if used >= per_month:
+                raise RateLimitExceeded(f"Rate limit exceeded: Maximum {per_month:,} requests per month")
+            # Generic cell rate: up to ``burst`` requests may go out back to back.
+            start = max(next_slot, now)
+            wait = max(0.0, start - now - (burst - 1) * interval)
+            if wait > max_wait:
+                raise RateLimitExceeded(
+                    f"Rate limit exceeded: next slot in {wait:.1f}s, more than {max_wait:g}s away"
+                )
+            slot = start + interval
+            self._conn.execute(
+                "UPDATE quota SET next_slot = ?, month = ?, used = ? WHERE name = ?",
+                (slot, month, used + 1, self.name)
+            )
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return wait, slot
+
+    def release(self, slot: float, interval: float) -> None:
+        """Give back a reservation whose request was never sent."""
+        month = current_month(time.time())
+        with self._conn:
+            self._conn.execute(
+                "UPDATE quota SET used = used - 1 WHERE name = ? AND month = ? AND used > 0", (self.name, month)
+            )
+            # The slot itself can only be returned if nobody has queued behind it.
+            self._conn.execute(
+                "UPDATE quota SET next_slot = next_slot - ? WHERE name = ? AND next_slot = ?",
+                (interval, self.name, slot)
+            )
+
+    def usage(self) -> Tuple[float, str, int]:
+        """``(next_slot, month, used)`` for the current month."""
+        now = time.time()
+        next_slot, month, used = self._conn.execute(
+            "SELECT next_slot, month, used FROM quota WHERE name = ?", (self.name,)
+        ).fetchone()
+        if month != current_month(now):
+            return next_slot, current_month(now), 0
+        return next_slot, month, used
+
+    def close(self) -> None:
+        self._conn.close()
+
+class RateLimiter:
+    """Brave plan limits: requests per second and per calendar month.
+
+    A request that would exceed the per-second rate is queued until its slot
+    comes up rather than rejected, so bursts drain at exactly the configured
+    rate: ``INTERACTIVE`` requests ahead of ``BACKGROUND`` ones, each in
+    arrival order. State lives in a :class:`QuotaStore`, so every worker
+    process sharing the file shares one budget.
+
+    Settings are read from the environment:
+
+        BRAVE_RATE_PER_SECOND  requests per second (default 1)
+        BRAVE_RATE_BURST       requests allowed back to back (default 1)
+        BRAVE_RATE_MAX_WAIT    seconds a request may queue (default 10)
+        BRAVE_RATE_PER_MONTH   requests per calendar month, UTC (default 15000)
+        BRAVE_QUOTA_PATH       SQLite file holding the shared quota
+                               (default: brave_quota.db in the project root)
+    """
+
+    def __init__(self, per_second: Optional[float] = None, per_month: Optional[int] = None,
+                 burst: Optional[int] = None, max_wait: Optional[float] = None, path: Optional[str] = None):
+        self.per_second = per_second or float(os.getenv("BRAVE_RATE_PER_SECOND", "1"))
+        if self.per_second <= 0:
+            raise ValueError("per_second must be positive")
+        self.per_month = per_month or int(os.getenv("BRAVE_RATE_PER_MONTH", "15000"))
+        self.burst = max(1, burst or int(os.getenv("BRAVE_RATE_BURST", "1")))
+        self.max_wait = float(os.getenv("BRAVE_RATE_MAX_WAIT", "10")) if max_wait is None else max_wait
+        self.interval = 1.0 / self.per_second
+        self.store = QuotaStore(path or os.getenv("BRAVE_QUOTA_PATH") or DEFAULT_QUOTA_PATH)
+        # One thread owns the connection, which also keeps reservations in call order.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="brave-quota")
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._ready_at = 0.0
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def acquire(self, priority: int = Priority.INTERACTIVE) -> float:
+        """Wait for permission to make one upstream request. Returns the seconds waited.
+
+        Waiting requests are let through lowest ``priority`` first, in
+        arrival order within a priority.
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        ahead = sum(1 for waiter in self._waiters if waiter[0] <= priority and not waiter[3].done())
+        estimate = max(0.0, self._ready_at - now) + (ahead - self.burst + 1) * self.interval
+        if estimate > self.max_wait:
+            raise RateLimitExceeded(
+                f"Rate limit exceeded: next slot in {estimate:.1f}s, more than {self.max_wait:g}s away"
+            )
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), now + self.max_wait, future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        await future
+        return loop.time() - now
+
+    async def _dispatch(self) -> None:
+        # Slots are reserved one at a time for the head of the queue, so a
+        # request that arrives later with a higher priority still goes first.
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            _, _, deadline, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            try:
+                wait, slot = await self._call(
+                    self.store.reserve, self.interval, self.burst, self.per_month, max(0.0, deadline - loop.time())
+                )
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if wait > 0:
+                self._ready_at = loop.time() + wait
+                await asyncio.sleep(wait)
+            if future.done():
+                # The caller gave up while its slot came up.
+                self._executor.submit(self.store.release, slot, self.interval)
+            else:
+                future.set_result(None)
+
+    async def remaining(self) -> Dict[str, Any]:
+        """Budget left, as reported by ``GET /search/quota``."""
+        next_slot, month, used = await self._call(self.store.usage)
+        now = time.time()
+        backlog = max(0.0, next_slot - now)
+        return {
+            "per_second": self.per_second,
+            "per_month": self.per_month,
+            "month": month,
+            "used": used,
+            "remaining": max(0, self.per_month - used),
+            "resets_at": month_end(month),
+            "queued": max(0, math.ceil(backlog / self.interval - self.burst - 1e-9))
+                      + sum(1 for waiter in self._waiters if not waiter[3].done()),
+            "next_slot_in": max(0.0, backlog - (self.burst - 1) * self.interval),
+        }
+
+    def close(self) -> None:
+        self._executor.submit(self.store.close)
+        self._executor.shutdown(wait=True)
+
+_shared: Optional[RateLimiter] = None
+
+def shared_rate_limiter() -> RateLimiter:
+    """The process-wide limiter every Brave call path goes through."""
+    global _shared
+    if _shared is None:
+        _shared = RateLimiter()
+    return _shared
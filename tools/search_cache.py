@@ -0,0 +1,149 @@
+"""In-process result cache for upstream search calls."""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+import json
+import time
+
+Loader = Callable[[], Awaitable[Any]]
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, for cache keys."""
+    return " ".join(query.casefold().split())
+
+class CacheEntry:
+    __slots__ = ("value", "size", "expires", "stale_until")
+
+    def __init__(self, value: Any, size: int, expires: float, stale_until: float):
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.stale_until = stale_until
+
+class SearchCache:
+    """Async TTL + LRU cache with single-flight loading.
+
+    Entries expire ``ttl`` seconds after they were loaded and the least
+    recently used ones are evicted once there are more than ``max_entries``
+    or their JSON size passes ``max_bytes``. Concurrent misses for the same
+    key share one call to the loader; failures are not cached. A caller
+    only joins a load started at its own ``priority`` or a more urgent
+    (lower) one, so it never waits behind a load queued as background work.
+
+    With ``stale_ttl > 0`` an expired entry is still served for that many
+    seconds while a single background load refreshes it
+    (stale-while-revalidate).
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024,
+                 ttl: float = 300.0, stale_ttl: float = 0.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        # Loads in progress per key, by the priority they were started with.
+        self._inflight: Dict[Hashable, Dict[int, asyncio.Task]] = {}
+        self._bytes = 0
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0,
+                       "evictions": 0, "errors": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["stale_hits"] + self._stats["misses"] + self._stats["coalesced"]
+        hits = self._stats["hits"] + self._stats["stale_hits"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def lookup(self, key: Hashable) -> Any:
+        """The unexpired value for ``key``, or None, without loading anything."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry.expires:
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry.value
+
+    async def get(self, key: Hashable, loader: Loader, ttl: Optional[float] = None, priority: int = 0) -> Any:
+        """Return the value for ``key``, calling ``loader`` on a miss."""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.expires:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry.value
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self._stats["stale_hits"] += 1
+                if not self._inflight.get(key):
+                    self._stats["refreshes"] += 1
+                    self._start(key, loader, ttl, priority).add_done_callback(self._refreshed)
+                return entry.value
+
+        task = self._joinable(key, priority)
+        if task is not None:
+            self._stats["coalesced"] += 1
+        else:
+            self._stats["misses"] += 1
+            task = self._start(key, loader, ttl, priority)
+        # Shielded so a cancelled caller does not cancel the load the others wait on.
+        return await asyncio.shield(task)
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        size = len(json.dumps(value, separators=(",", ":"), default=str))
+        if size > self.max_bytes:
+            return
+        self._discard(key)
+        now = time.monotonic()
+        self._entries[key] = CacheEntry(value, size, now + ttl, now + ttl + self.stale_ttl)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._stats["evictions"] += 1
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _joinable(self, key: Hashable, priority: int) -> Optional[asyncio.Task]:
+        loads = [(started, task) for started, task in self._inflight.get(key, {}).items() if started <= priority]
+        return min(loads, key=lambda load: load[0])[1] if loads else None
+
+    def _start(self, key: Hashable, loader: Loader, ttl: Optional[float], priority: int) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, loader, ttl, priority))
+        self._inflight.setdefault(key, {})[priority] = task
+        return task
+
+    @staticmethod
+    def _refreshed(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error refreshing cached search: {task.exception()}")
+
+    async def _load(self, key: Hashable, loader: Loader, ttl: Optional[float], priority: int) -> Any:
+        try:
+            value = await loader()
+        except BaseException:
+            self._stats["errors"] += 1
+            raise
+        finally:
+            loads = self._inflight.get(key, {})
+            loads.pop(priority, None)
+            if not loads:
+                self._inflight.pop(key, None)
+        self.put(key, value, ttl)
+        return value
@@ -0,0 +1,74 @@
+"""Field projection for Brave search results."""
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import re
+
+COMPACT_FIELDS = ("title", "url", "description")
+ALL_FIELDS = "*"
+FIELD_RE = re.compile(r"^\w+(\.\w+)*$")
+
+Fields = Optional[Tuple[Tuple[str, ...], ...]]
+
+def parse_fields(value: Union[None, str, Iterable[str]]) -> Fields:
+    """Turn a ``fields`` parameter into paths to keep.
+
+    ``None`` gives the compact profile (title, url, description) and ``"*"``
+    keeps whole results (returned as None). Otherwise ``value`` is a list or
+    comma-separated string of field names; dotted names such as
+    ``meta_url.hostname`` pick nested values.
+    """
+    if value is None:
+        names = list(COMPACT_FIELDS)
+    elif isinstance(value, str):
+        names = [name.strip() for name in value.split(",") if name.strip()]
+    else:
+        names = [str(name).strip() for name in value]
+    if ALL_FIELDS in names:
+        return None
+    if not names:
+        raise ValueError("fields must name at least one field")
+    for name in names:
+        if not FIELD_RE.match(name):
+            raise ValueError(f"Invalid field name: {name}")
+    return tuple(tuple(name.split(".")) for name in names)
+
+def project(result: Dict[str, Any], fields: Fields) -> Dict[str, Any]:
+    """Copy only ``fields`` of one result; missing fields are left out."""
+    if fields is None:
+        return result
+    projected: Dict[str, Any] = {}
+    for path in fields:
+        value = result
+        for part in path:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in path[:-1]:
+                target = target.setdefault(part, {})
+            target[path[-1]] = value
+    return projected
+
+def project_results(results: List[Dict[str, Any]], fields: Fields) -> List[Dict[str, Any]]:
+    if fields is None:
+        return results
+    return [project(result, fields) for result in results]
+
+def project_response(data: Dict[str, Any], fields: Fields) -> Dict[str, Any]:
+    """Project a web search response down to its query and web results.
+
+    Other sections of the response (news, videos, discussions, ...) are only
+    kept when whole results are asked for.
+    """
+    if fields is None:
+        return data
+    web = data.get("web", {})
+    compact: Dict[str, Any] = {
+        "type": data.get("type"),
+        "web": {"results": project_results(web.get("results", []), fields)}
+    }
+    if isinstance(data.get("query"), dict):
+        compact["query"] = {"original": data["query"].get("original")}
+    if "totalCount" in web:
+        compact["web"]["totalCount"] = web["totalCount"]
+    return compact
@@ -1,20 +1,20 @@
 import os
-import requests
+import json
+import inspect
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any, Union
 from enum import Enum
 from datetime import datetime
-import json
-import aiohttp
-import asyncio
-from urllib.parse import urlparse
 
 # Import all tools
 from tools.base import Tool, BaseTool, ToolType
 from tools.brave_search import BraveSearchTool
+from tools.fetch import FetchBatchRequest, FetchError, FetchRequest, FetchResponse, FetchServer
+from tools.http_cache import HttpCache, header
 from tools.memory import MemoryTool
 # from tools.langchain_tool import LangChainToolWrapper  # Temporarily commented out
 
@@ -56,112 +56,12 @@ class MCPResponse(BaseModel):
 class SearchRequest(BaseModel):
     query: str
     count: Optional[int] = 10
+    fields: Optional[Union[List[str], str]] = None
 
 class SearchResponse(BaseModel):
     results: List[dict]
     total_count: int
 
-# Enhanced Fetch Models
-class FetchRequest(BaseModel):
-    url: str
-    method: str = "GET"
-    headers: Optional[Dict[str, str]] = None
-    body: Optional[Union[str, Dict[str, Any]]] = None
-    timeout: Optional[int] = 30
-    follow_redirects: bool = True
-    verify_ssl: bool = True
-
-class FetchResponse(BaseModel):
-    status: int
-    headers: Dict[str, str]
-    body: str
-    url: str
-    redirect_chain: List[str] = Field(default_factory=list)
-    timing: Dict[str, float] = Field(default_factory=dict)
-    error: Optional[str] = None
-
-class FetchError(Exception):
-    def __init__(self, message: str, status_code: int = 500):
-        self.message = message
-        self.status_code = status_code
-        super().__init__(self.message)
-
-class FetchServer:
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.start_time: float = 0
-
-    async def setup(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-
-    async def cleanup(self):
-        if self.session:
-            await self.session.close()
-            self.session = None
-
-    def _validate_url(self, url: str):
-        try:
-            result = urlparse(url)
-            if not all([result.scheme, result.netloc]):
-                raise ValueError("Invalid URL")
-        except Exception as e:
-            raise FetchError(f"Invalid URL: {str(e)}")
-
-    def _prepare_headers(self, headers: Optional[Dict[str, str]]) -> Dict[str, str]:
-        default_headers = {
-            "User-Agent": "CopilotKit-MCP/1.0",
-            "Accept": "*/*"
-        }
-        if headers:
-            default_headers.update(headers)
-        return default_headers
-
-    def _prepare_body(self, body: Optional[Union[str, Dict[str, Any]]]) -> Optional[str]:
-        if isinstance(body, dict):
-            return json.dumps(body)
-        return body
-
-    async def fetch(self, request: FetchRequest) -> FetchResponse:
-        await self.setup()
-        self._validate_url(request.url)
-        
-        headers = self._prepare_headers(request.headers)
-        body = self._prepare_body(request.body)
-        
-        self.start_time = asyncio.get_event_loop().time()
-        redirect_chain = []
-        
-        try:
-            async with self.session.request(
-                method=request.method,
-                url=request.url,
-                headers=headers,
-                data=body,
-                timeout=request.timeout,
-                allow_redirects=request.follow_redirects,
-                ssl=request.verify_ssl
-            ) as response:
-                end_time = asyncio.get_event_loop().time()
-                body = await response.text()
-                
-                if request.follow_redirects:
-                    redirect_chain = [str(resp.url) for resp in response.history]
-                
-                return FetchResponse(
-                    status=response.status,
-                    headers=dict(response.headers),
-                    body=body,
-                    url=str(response.url),
-                    redirect_chain=redirect_chain,
-                    timing={"total_seconds": end_time - self.start_time}
-                )
-                
-        except asyncio.TimeoutError:
-            raise FetchError("Request timed out", 408)
-        except Exception as e:
-            raise FetchError(str(e))
-
 # Global tools registry and servers
 tools: Dict[str, BaseTool] = {}
 fetch_server: Optional[FetchServer] = None
@@ -172,7 +72,7 @@ async def startup_event():
     global tools, fetch_server
     
     # Initialize fetch server
-    fetch_server = FetchServer()
+    fetch_server = FetchServer(cache=HttpCache.from_env())
     await fetch_server.setup()
     
     # Initialize and register tools
@@ -191,6 +91,12 @@ async def shutdown_event():
     """Cleanup resources."""
     if fetch_server:
         await fetch_server.cleanup()
+    brave_tool = tools.get("brave_search")
+    if brave_tool:
+        await brave_tool.close()
+    memory_tool = tools.get("memory")
+    if memory_tool:
+        memory_tool.store.close()
 
 @app.post("/mcp/tools")
 async def list_tools() -> Dict[str, List[Tool]]:
@@ -208,6 +114,8 @@ async def execute_tool(request: MCPRequest) -> MCPResponse:
     try:
         tool = tools[request.tool_name]
         result = tool.execute(request.parameters)
+        if inspect.isawaitable(result):
+            result = await result
         
         return MCPResponse(
             result=result,
@@ -225,18 +133,52 @@ async def search(request: SearchRequest) -> SearchResponse:
         if not tool:
             raise HTTPException(status_code=404, detail="Brave Search tool not found")
         
-        results = tool.execute({
+        response = await tool.execute({
             "query": request.query,
-            "count": request.count
+            "count": request.count,
+            "fields": request.fields
         })
+        if response.error:
+            raise HTTPException(status_code=502, detail=response.error)
         
+        web = (response.result or {}).get("web", {})
         return SearchResponse(
-            results=results.get("results", []),
-            total_count=len(results.get("results", []))
+            results=web.get("results", []),
+            total_count=len(web.get("results", []))
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/fetch", response_model=FetchResponse)
+async def fetch_url(request: FetchRequest):
+    """Fetch a URL. With ``stream`` the body is passed through as it arrives."""
+    try:
+        if request.stream:
+            meta, chunks = await fetch_server.stream(request)
+            return StreamingResponse(chunks, status_code=meta.status, media_type=header(meta.headers, "content-type"),
+                                     headers={"X-Fetch-Url": meta.url})
+        return await fetch_server.fetch(request)
+    except FetchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+@app.post("/fetch/batch")
+async def fetch_batch(request: FetchBatchRequest):
+    """Fetch several URLs at once and stream each response as NDJSON when it is ready.
+
+    Each line is ``{"index", "url", "result"}`` with a FetchResponse, or
+    ``{"index", "url", "error", "status_code"}`` for a failed fetch.
+    """
+    items = fetch_server.fetch_batch(request.requests, request.timeout, request.concurrency, request.per_host)
+    return StreamingResponse(fetch_lines(items), media_type="application/x-ndjson")
+
+async def fetch_lines(items):
+    async for item in items:
+        if "result" in item:
+            item["result"] = item["result"].model_dump()
+        yield json.dumps(item) + "\n"
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8003)